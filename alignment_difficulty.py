@@ -1,6 +1,6 @@
 # %%
-from utils.geometric_mean_odds import get_geometric_mean, odds_to_probability
-from utils.logistic_interpolation import get_logistic_interpolation
+from utils.geometric_mean_odds import geometric_mean_odds
+from utils.logistic_interpolation import get_logistic_interpolation, logistic_curves
 
 # %%
 values = [
@@ -16,7 +16,7 @@ values = [
     0.3,
     0.8,
 ]
-geometric_mean_value = odds_to_probability(get_geometric_mean(values))
+geometric_mean_value = float(geometric_mean_odds(values))
 print(f"The geometric mean of the odds is: {geometric_mean_value:.4f}")
 
 # %%
@@ -32,11 +32,9 @@ print("\nProbability estimates for alignment difficulty:")
 print(alignment_distribution.to_string(index=False))
 
 # Verify we hit close to our target probability
-target_year = get_logistic_interpolation(
-    [original_year], original_year, original_prob, k
-)
+target_year = logistic_curves([original_year], original_year, original_prob, k)
 print(
-    f"\nProbability for {original_year} (should be close to {original_prob*100}%): {target_year['probability_percentage'].iloc[0]:.2f}%"
+    f"\nProbability for {original_year} (should be close to {original_prob*100}%): {target_year[0] * 100:.2f}%"
 )
 
 # %%
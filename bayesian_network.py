@@ -1,90 +1,296 @@
 # %%
 import numpy as np
-from typing import List, Dict, Tuple
-import matplotlib.pyplot as plt
-from scipy.interpolate import PchipInterpolator
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+from numpy.typing import ArrayLike
+from forecast_inputs import load_cpt, load_forecast_inputs
+from utils.cpt import AdditiveCPT, CPTLike, NoisyOrCPT, contract_cpt, to_dense
+from utils.compiled import CompiledForecast
+from utils.curves import LogOddsLinearCurve, NodeCurve
+from utils.markov import simulate_lock_in
+from utils.monte_carlo import NodeDistribution, sample_lock_in
+from utils.network import BayesianNetwork
 
 
 # %%
 class LockInForecast:
-    def __init__(self, forecast_years: List[int] = [2030, 2055, 2080, 2105, 2130]):
+    def __init__(self, forecast_years: ArrayLike = [2030, 2055, 2080, 2105, 2130]):
+        # Any grid works when the nodes are NodeCurves, e.g. range(2025, 2201)
         self.forecast_years = forecast_years
+        # Parent events in CPT axis order, each mapped to its probabilities
+        # over the forecast years or to a continuous NodeCurve
+        self.nodes: Dict[str, Union[np.ndarray, NodeCurve]] = {}
+        # (cpt, snapshot of the CPT, years and dependencies, network) of the
+        # last query, reused while the same CPT is passed in unchanged
+        self._query_network = None
+
+    def add_node(self, name: str, probabilities: Union[ArrayLike, NodeCurve]) -> None:
+        """
+        Register a parent event of the lock-in node.
+
+        Args:
+            name (str): Name of the event, e.g. "agi" or "world_gov"
+            probabilities (array-like or NodeCurve): Probability of the event for
+                each forecast year, shape (n_years,) or (n_scenarios, n_years),
+                or a curve evaluated on whatever forecast_years are set
+        """
+        self._query_network = None
+        if isinstance(probabilities, NodeCurve):
+            self.nodes[name] = probabilities
+            return
+
+        probabilities = np.asarray(probabilities, dtype=float)
+        if probabilities.shape[-1] != len(self.forecast_years):
+            raise ValueError(
+                f"Node '{name}' has {probabilities.shape[-1]} values but there are "
+                f"{len(self.forecast_years)} forecast years"
+            )
+        self.nodes[name] = probabilities
+
+    def evaluate_nodes(
+        self, nodes: Optional[Dict[str, Union[ArrayLike, NodeCurve]]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Probabilities of every node over the forecast years.
+        """
+        if nodes is None:
+            nodes = self.nodes
+        return {
+            name: (
+                node(self.forecast_years)
+                if isinstance(node, NodeCurve)
+                else np.asarray(node, dtype=float)
+            )
+            for name, node in nodes.items()
+        }
+
+    def calculate_lock_in(
+        self,
+        cpt: CPTLike,
+        nodes: Optional[Dict[str, Union[ArrayLike, NodeCurve]]] = None,
+    ) -> np.ndarray:
+        """
+        Calculate P(Lock-in) for any number of independent parent events.
+
+        Args:
+            cpt (dict, numpy.ndarray, ConditionalTable, AdditiveCPT or NoisyOrCPT):
+                P(Lock-in | parents), keyed or indexed in the same order as the
+                nodes
+            nodes (dict, optional): Ordered mapping of node names to
+                probabilities or NodeCurves. Defaults to the nodes registered
+                with add_node
+
+        Returns:
+            numpy.ndarray: P(Lock-in) for each forecast year
+        """
+        marginals = list(self.evaluate_nodes(nodes).values())
+
+        return contract_cpt(cpt, marginals)
+
+    def compile(self, cpt: CPTLike) -> CompiledForecast:
+        """
+        Precompile the CPT with the current nodes on the forecast years, for
+        repeated forecasts that replace only a few node curves, e.g.
+        compiled.evaluate({"wwiii": new_wwiii}).
+        """
+        return CompiledForecast(cpt, self.evaluate_nodes())
+
+    def build_network(
+        self,
+        cpt: CPTLike,
+        dependencies: Optional[Dict[str, Tuple[Sequence[str], ArrayLike]]] = None,
+    ) -> BayesianNetwork:
+        """
+        Bayesian network over the registered nodes and a "lock_in" node, for
+        exact inference when parent events are not independent.
+
+        Args:
+            cpt: P(Lock-in | parents) in the same order as the nodes
+            dependencies (dict, optional): Node name to (parent names,
+                P(node | parents)), with the table shaped (2,) * n_parents and
+                optionally followed by (n_years,). Such nodes use this table
+                instead of their independent probabilities, e.g.
+                {"misalignment": (["agi"], [p_given_no_agi, p_given_agi])}
+
+        Returns:
+            BayesianNetwork: Network whose queries give values per forecast year
+        """
+        nodes = self.evaluate_nodes()
+        dependencies = dependencies or {}
+
+        network = BayesianNetwork()
+        pending = list(nodes)
+        while pending:
+            # Add each node once all of its dependency parents are in
+            ready = [
+                name
+                for name in pending
+                if all(p in network.nodes for p in dependencies.get(name, ((),))[0])
+            ]
+            if not ready:
+                raise ValueError(f"Dependencies among {pending} contain a cycle")
+            for name in ready:
+                if name in dependencies:
+                    parents, table = dependencies[name]
+                    network.add_node(name, table, parents)
+                else:
+                    network.add_node(name, nodes[name])
+                pending.remove(name)
+
+        # Parametric CPTs become chains of small factors, so networks with
+        # dozens of parents never build the 2^n table
+        if isinstance(cpt, (AdditiveCPT, NoisyOrCPT)):
+            if cpt.n_parents != len(nodes):
+                raise ValueError(
+                    f"CPT has {cpt.n_parents} parents but there are "
+                    f"{len(nodes)} nodes"
+                )
+        if isinstance(cpt, AdditiveCPT):
+            network.add_additive("lock_in", list(nodes), cpt.weights, cpt.baseline)
+        elif isinstance(cpt, NoisyOrCPT):
+            network.add_noisy_or("lock_in", list(nodes), cpt.weights, cpt.leak)
+        else:
+            network.add_node("lock_in", to_dense(cpt), list(nodes))
+        return network
+
+    def query(
+        self,
+        target: str,
+        cpt: CPTLike,
+        evidence: Optional[Dict[str, bool]] = None,
+        dependencies: Optional[Dict[str, Tuple[Sequence[str], ArrayLike]]] = None,
+        year: Optional[float] = None,
+    ) -> Union[np.ndarray, float]:
+        """
+        Conditional probability of a node given observed events, e.g.
+        P(lock-in | WWIII) with query("lock_in", cpt, {"wwiii": True}) or the
+        posterior P(AGI | lock-in) with query("agi", cpt, {"lock_in": True}).
+
+        The network built from cpt and dependencies is kept between calls
+        while the same CPT is passed in and neither its entries, the dependency
+        tables nor the forecast years have changed, and its joint factors are cached
+        per set of query variables, so repeated queries are table lookups.
+
+        Args:
+            target (str): Node to query, a registered node or "lock_in"
+            cpt: P(Lock-in | parents) in the same order as the nodes
+            evidence (dict, optional): Observed states, e.g. {"agi": False}.
+                An event being observed at a forecast year means it happened
+                by that year
+            dependencies (dict, optional): Conditional tables between nodes,
+                as in build_network
+            year (float, optional): Return only the value for this forecast
+                year, e.g. 2055
+
+        Returns:
+            numpy.ndarray or float: P(target | evidence) for each forecast year,
+            or for the given year
+        """
+        # Snapshot the CPT, the dependency tables and the year grid, so
+        # editing any of them in place rebuilds the network. Parametric CPTs
+        # are snapshotted by their parameters rather than their 2^n table
+        if isinstance(cpt, AdditiveCPT):
+            content = (np.asarray(cpt.weights).tobytes(), float(cpt.baseline))
+        elif isinstance(cpt, NoisyOrCPT):
+            content = (np.asarray(cpt.weights).tobytes(), float(cpt.leak))
+        else:
+            content = np.asarray(to_dense(cpt), dtype=float).tobytes()
+        snapshot = (
+            content,
+            tuple(np.asarray(self.forecast_years, dtype=float).tolist()),
+            tuple(
+                (name, tuple(parents), np.asarray(table, dtype=float).tobytes())
+                for name, (parents, table) in (dependencies or {}).items()
+            ),
+        )
+        cached = self._query_network
+        if cached is None or cached[0] is not cpt or cached[1] != snapshot:
+            network = self.build_network(cpt, dependencies)
+            self._query_network = (cpt, snapshot, network)
+        network = self._query_network[2]
+
+        probabilities = network.query(target, evidence)
+        if year is None:
+            return probabilities
+        index = list(self.forecast_years).index(year)
+        return float(probabilities[..., index])
+
+    def cumulative_lock_in(
+        self, cpt: CPTLike, start_year: int = 2025, horizon: float = 100.0
+    ) -> np.ndarray:
+        """
+        P(Lock-in by year) for each forecast year from the yearly Markov chain
+        in utils/markov.py, so lock-in carries over and the result never falls
+        between forecast years.
+
+        Nodes given as arrays are interpolated between forecast years in
+        log-odds, as in load_node_curves.
+
+        Args:
+            cpt: P(Lock-in | parents) in the same order as the nodes, read as
+                the chance of lock-in if that world persisted for horizon years
+            start_year (int): Year the chain starts, with no lock-in yet
+            horizon (float): Years over which a CPT entry applies
+
+        Returns:
+            numpy.ndarray: Cumulative P(Lock-in) for each forecast year
+        """
+        years = np.asarray(self.forecast_years, dtype=float)
+        if years.min() < start_year:
+            raise ValueError(f"Forecast years must not be before {start_year}")
+        nodes = {
+            name: (
+                node
+                if isinstance(node, NodeCurve)
+                else LogOddsLinearCurve(self.forecast_years, node)
+            )
+            for name, node in self.nodes.items()
+        }
+        chain = simulate_lock_in(
+            cpt, nodes, start_year, int(np.ceil(years.max())), horizon
+        )
+        return np.interp(years, chain["years"], chain["p_lock_in"])
+
+    def sample_forecast(
+        self,
+        cpt: CPTLike,
+        distributions: Dict[str, NodeDistribution],
+        n_samples: int = 1_000_000,
+        **kwargs,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Monte Carlo version of calculate_lock_in, where each node is a
+        distribution (BetaNode, LogitNormalNode, EmpiricalNode) rather than a
+        point estimate. Extra keyword arguments are passed to sample_lock_in.
+
+        Returns:
+            dict: Forecast years with the mean and quantile bands of P(Lock-in)
+        """
+        results = sample_lock_in(cpt, distributions, n_samples, **kwargs)
+        results["years"] = self.forecast_years
+        return results
 
     def calculate_conditional_probability(
         self,
-        p_agi: List[float],
-        p_misalignment: List[float],
-        p_wwiii: List[float],
-        p_wbe: List[float],
-        p_stable_total: List[float],
-        p_world_gov: List[float],
-        cpt: Dict[Tuple[bool, bool, bool, bool, bool, bool], float],
-    ) -> List[float]:
-        p_lock_in = []
-
-        for year_idx in range(len(self.forecast_years)):
-            # Calculate joint probability across all possible combinations
-            p_total = 0
-
-            # Iterate through all possible combinations of events
-            for agi in [True, False]:
-                for misalignment in [True, False]:
-                    for wwiii in [True, False]:
-                        for wbe in [True, False]:
-                            for stable_total in [True, False]:
-                                for world_gov in [True, False]:
-                                    # Calculate probability of this combination
-                                    p_combination = (
-                                        (
-                                            p_agi[year_idx]
-                                            if agi
-                                            else (1 - p_agi[year_idx])
-                                        )
-                                        * (
-                                            p_misalignment[year_idx]
-                                            if misalignment
-                                            else (1 - p_misalignment[year_idx])
-                                        )
-                                        * (
-                                            p_wwiii[year_idx]
-                                            if wwiii
-                                            else (1 - p_wwiii[year_idx])
-                                        )
-                                        * (
-                                            p_wbe[year_idx]
-                                            if wbe
-                                            else (1 - p_wbe[year_idx])
-                                        )
-                                        * (
-                                            p_stable_total[year_idx]
-                                            if stable_total
-                                            else (1 - p_stable_total[year_idx])
-                                        )
-                                        * (
-                                            p_world_gov[year_idx]
-                                            if world_gov
-                                            else (1 - p_world_gov[year_idx])
-                                        )
-                                    )
-
-                                    # Multiply by conditional probability of lock-in given this combination
-                                    p_total += (
-                                        p_combination
-                                        * cpt[
-                                            (
-                                                agi,
-                                                misalignment,
-                                                wwiii,
-                                                wbe,
-                                                stable_total,
-                                                world_gov,
-                                            )
-                                        ]
-                                    )
-
-            p_lock_in.append(p_total)
-
-        return p_lock_in
+        p_agi: ArrayLike,
+        p_misalignment: ArrayLike,
+        p_wwiii: ArrayLike,
+        p_wbe: ArrayLike,
+        p_stable_total: ArrayLike,
+        p_world_gov: ArrayLike,
+        cpt: CPTLike,
+    ) -> np.ndarray:
+        # Each input is either one series over the forecast years, shape
+        # (n_years,), or a stack of scenarios, shape (n_scenarios, n_years)
+        nodes = {
+            "agi": p_agi,
+            "misalignment": p_misalignment,
+            "wwiii": p_wwiii,
+            "wbe": p_wbe,
+            "stable_total": p_stable_total,
+            "world_gov": p_world_gov,
+        }
+
+        return self.calculate_lock_in(cpt, nodes)
 
     def generate_forecast(
         self,
@@ -94,7 +300,7 @@ class LockInForecast:
         p_wbe: List[float],
         p_stable_total: List[float],
         p_world_gov: List[float],
-        cpt: Dict[Tuple[bool, bool, bool, bool, bool, bool], float],
+        cpt: CPTLike,
     ) -> Dict[str, List[float]]:
 
         # Calculate final lock-in probability
@@ -118,6 +324,10 @@ class LockInForecast:
 
 
 def plot_forecast(forecast):
+    # Imported here so number-only runs do not pay for matplotlib and scipy
+    import matplotlib.pyplot as plt
+    from scipy.interpolate import PchipInterpolator
+
     years = forecast["years"]
 
     probabilities = {
@@ -170,7 +380,8 @@ def plot_forecast(forecast):
     plt.grid(True, linestyle="--", alpha=0.7)
 
     plt.ylim(0, 1)
-    plt.xticks(years)
+    if len(years) <= 10:
+        plt.xticks(years)
 
     plt.tight_layout()
     plt.show()
@@ -178,228 +389,17 @@ def plot_forecast(forecast):
 
 # %%
 def main():
-    p_agi = [0.234123, 0.684444, 0.809520, 0.962057, 0.991274]
-    p_alignment = [
-        0.39715637,
-        0.43708259,
-        0.46858015,
-        0.49230160,
-        0.50954967,
-    ]
-    p_wwiii = [0.3000, 0.3144, 0.3861, 0.4579, 0.5297]
-    p_wbe = [0.0653, 0.402, 0.5218, 0.599, 0.6549]
-    p_stable_total = [0.000288, 0.000405, 0.000539, 0.000689, 0.000861]
-    p_world_gov = [0.0048, 0.0161, 0.04, 0.0639, 0.0752]
-
-    # Conditional Probability Weights
-    agi_weight = 0.1
-    alignment_weight = 0.1
-    wwiii_weight = 0.1
-    wbe_weight = 0.1
-    stable_total_weight = 0.1
-    world_gov_weight = 0.1
-
-    # Conditional probability table
-    # (AGI, Alignment, WWIII, WBE, Stable Totalitarianism, World Government) -> P(Lock-in)
-    cpt = {
-        (True, True, True, True, True, True): sum(
-            [
-                agi_weight,
-                alignment_weight,
-                wwiii_weight,
-                wbe_weight,
-                stable_total_weight,
-                world_gov_weight,
-            ]
-        ),
-        (True, True, True, True, True, False): sum(
-            [
-                agi_weight,
-                alignment_weight,
-                wwiii_weight,
-                wbe_weight,
-                stable_total_weight,
-            ]
-        ),
-        (True, True, True, True, False, True): sum(
-            [agi_weight, alignment_weight, wwiii_weight, wbe_weight, world_gov_weight]
-        ),
-        (True, True, True, True, False, False): sum(
-            [agi_weight, alignment_weight, wwiii_weight, wbe_weight]
-        ),
-        (True, True, True, False, True, True): sum(
-            [
-                agi_weight,
-                alignment_weight,
-                wwiii_weight,
-                stable_total_weight,
-                world_gov_weight,
-            ]
-        ),
-        (True, True, True, False, True, False): sum(
-            [agi_weight, alignment_weight, wwiii_weight, stable_total_weight]
-        ),
-        (True, True, True, False, False, True): sum(
-            [agi_weight, alignment_weight, wwiii_weight, world_gov_weight]
-        ),
-        (True, True, True, False, False, False): sum(
-            [agi_weight, alignment_weight, wwiii_weight]
-        ),
-        (True, True, False, True, True, True): sum(
-            [
-                agi_weight,
-                alignment_weight,
-                wbe_weight,
-                stable_total_weight,
-                world_gov_weight,
-            ]
-        ),
-        (True, True, False, True, True, False): sum(
-            [agi_weight, alignment_weight, wbe_weight, stable_total_weight]
-        ),
-        (True, True, False, True, False, True): sum(
-            [agi_weight, alignment_weight, wbe_weight, world_gov_weight]
-        ),
-        (True, True, False, True, False, False): sum(
-            [agi_weight, alignment_weight, wbe_weight]
-        ),
-        (True, True, False, False, True, True): sum(
-            [agi_weight, alignment_weight, stable_total_weight, world_gov_weight]
-        ),
-        (True, True, False, False, True, False): sum(
-            [agi_weight, alignment_weight, stable_total_weight]
-        ),
-        (True, True, False, False, False, True): sum(
-            [agi_weight, alignment_weight, world_gov_weight]
-        ),
-        (True, True, False, False, False, False): sum([agi_weight, alignment_weight]),
-        (True, False, True, True, True, True): sum(
-            [
-                agi_weight,
-                wwiii_weight,
-                wbe_weight,
-                stable_total_weight,
-                world_gov_weight,
-            ]
-        ),
-        (True, False, True, True, True, False): sum(
-            [agi_weight, wwiii_weight, wbe_weight, stable_total_weight]
-        ),
-        (True, False, True, True, False, True): sum(
-            [agi_weight, wwiii_weight, wbe_weight, world_gov_weight]
-        ),
-        (True, False, True, True, False, False): sum(
-            [agi_weight, wwiii_weight, wbe_weight]
-        ),
-        (True, False, True, False, True, True): sum(
-            [agi_weight, wwiii_weight, stable_total_weight, world_gov_weight]
-        ),
-        (True, False, True, False, True, False): sum(
-            [agi_weight, wwiii_weight, stable_total_weight]
-        ),
-        (True, False, True, False, False, True): sum(
-            [agi_weight, wwiii_weight, world_gov_weight]
-        ),
-        (True, False, True, False, False, False): sum([agi_weight, wwiii_weight]),
-        (True, False, False, True, True, True): sum(
-            [agi_weight, wbe_weight, stable_total_weight, world_gov_weight]
-        ),
-        (True, False, False, True, True, False): sum(
-            [agi_weight, wbe_weight, stable_total_weight]
-        ),
-        (True, False, False, True, False, True): sum(
-            [agi_weight, wbe_weight, world_gov_weight]
-        ),
-        (True, False, False, True, False, False): sum([agi_weight, wbe_weight]),
-        (True, False, False, False, True, True): sum(
-            [agi_weight, stable_total_weight, world_gov_weight]
-        ),
-        (True, False, False, False, True, False): sum(
-            [agi_weight, stable_total_weight]
-        ),
-        (True, False, False, False, False, True): sum([agi_weight, world_gov_weight]),
-        (True, False, False, False, False, False): agi_weight,
-        (False, True, True, True, True, True): sum(
-            [
-                alignment_weight,
-                wwiii_weight,
-                wbe_weight,
-                stable_total_weight,
-                world_gov_weight,
-            ]
-        ),
-        (False, True, True, True, True, False): sum(
-            [alignment_weight, wwiii_weight, wbe_weight, stable_total_weight]
-        ),
-        (False, True, True, True, False, True): sum(
-            [alignment_weight, wwiii_weight, wbe_weight, world_gov_weight]
-        ),
-        (False, True, True, True, False, False): sum(
-            [alignment_weight, wwiii_weight, wbe_weight]
-        ),
-        (False, True, True, False, True, True): sum(
-            [alignment_weight, wwiii_weight, stable_total_weight, world_gov_weight]
-        ),
-        (False, True, True, False, True, False): sum(
-            [alignment_weight, wwiii_weight, stable_total_weight]
-        ),
-        (False, True, True, False, False, True): sum(
-            [alignment_weight, wwiii_weight, world_gov_weight]
-        ),
-        (False, True, True, False, False, False): sum([alignment_weight, wwiii_weight]),
-        (False, True, False, True, True, True): sum(
-            [alignment_weight, wbe_weight, stable_total_weight, world_gov_weight]
-        ),
-        (False, True, False, True, True, False): sum(
-            [alignment_weight, wbe_weight, stable_total_weight]
-        ),
-        (False, True, False, True, False, True): sum(
-            [alignment_weight, wbe_weight, world_gov_weight]
-        ),
-        (False, True, False, True, False, False): sum([alignment_weight, wbe_weight]),
-        (False, True, False, False, True, True): sum(
-            [alignment_weight, stable_total_weight, world_gov_weight]
-        ),
-        (False, True, False, False, True, False): sum(
-            [alignment_weight, stable_total_weight]
-        ),
-        (False, True, False, False, False, True): sum(
-            [alignment_weight, world_gov_weight]
-        ),
-        (False, True, False, False, False, False): alignment_weight,
-        (False, False, True, True, True, True): sum(
-            [wwiii_weight, wbe_weight, stable_total_weight, world_gov_weight]
-        ),
-        (False, False, True, True, True, False): sum(
-            [wwiii_weight, wbe_weight, stable_total_weight]
-        ),
-        (False, False, True, True, False, True): sum(
-            [wwiii_weight, wbe_weight, world_gov_weight]
-        ),
-        (False, False, True, True, False, False): sum([wwiii_weight, wbe_weight]),
-        (False, False, True, False, True, True): sum(
-            [wwiii_weight, stable_total_weight, world_gov_weight]
-        ),
-        (False, False, True, False, True, False): sum(
-            [wwiii_weight, stable_total_weight]
-        ),
-        (False, False, True, False, False, True): sum([wwiii_weight, world_gov_weight]),
-        (False, False, True, False, False, False): wwiii_weight,
-        (False, False, False, True, True, True): sum(
-            [wbe_weight, stable_total_weight, world_gov_weight]
-        ),
-        (False, False, False, True, True, False): sum(
-            [wbe_weight, stable_total_weight]
-        ),
-        (False, False, False, True, False, True): sum([wbe_weight, world_gov_weight]),
-        (False, False, False, True, False, False): wbe_weight,
-        (False, False, False, False, True, True): sum(
-            [stable_total_weight, world_gov_weight]
-        ),
-        (False, False, False, False, True, False): stable_total_weight,
-        (False, False, False, False, False, True): world_gov_weight,
-        (False, False, False, False, False, False): 0.0,
-    }
+    inputs = load_forecast_inputs()
+    p_agi = inputs["p_agi"]
+    p_alignment = inputs["p_misalignment"]
+    p_wwiii = inputs["p_wwiii"]
+    p_wbe = inputs["p_wbe"]
+    p_stable_total = inputs["p_stable_total"]
+    p_world_gov = inputs["p_world_gov"]
+
+    # Conditional probability table: P(Lock-in | parents) is the sum of the
+    # weights in forecast_inputs.CPT_WEIGHTS of the parent events that happened
+    cpt = load_cpt()
 
     forecaster = LockInForecast()
     forecast = forecaster.generate_forecast(
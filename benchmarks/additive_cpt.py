@@ -0,0 +1,56 @@
+# %%
+# Check the closed-form additive and noisy-OR CPTs against the dense
+# contraction on the main() inputs, then time them for large parent counts.
+# Run from the repository root with `python -m benchmarks.additive_cpt`.
+import itertools
+import timeit
+import numpy as np
+from utils.cpt import AdditiveCPT, NoisyOrCPT, contract_cpt, cpt_to_array
+
+# %%
+# Inputs and weights from bayesian_network.main()
+marginals = [
+    np.array([0.234123, 0.684444, 0.809520, 0.962057, 0.991274]),
+    np.array([0.39715637, 0.43708259, 0.46858015, 0.49230160, 0.50954967]),
+    np.array([0.3000, 0.3144, 0.3861, 0.4579, 0.5297]),
+    np.array([0.0653, 0.402, 0.5218, 0.599, 0.6549]),
+    np.array([0.000288, 0.000405, 0.000539, 0.000689, 0.000861]),
+    np.array([0.0048, 0.0161, 0.04, 0.0639, 0.0752]),
+]
+weights = [0.1] * 6
+
+# The hand-written main() table: each entry is the sum of the weights of the
+# events that happened
+cpt = {
+    states: sum(w for w, state in zip(weights, states) if state)
+    for states in itertools.product([True, False], repeat=6)
+}
+additive = AdditiveCPT(weights)
+np.testing.assert_allclose(
+    contract_cpt(additive, marginals), contract_cpt(cpt_to_array(cpt), marginals)
+)
+np.testing.assert_allclose(
+    contract_cpt(additive, marginals), contract_cpt(additive.to_array(), marginals)
+)
+
+noisy_or = NoisyOrCPT(weights, leak=0.01)
+np.testing.assert_allclose(
+    contract_cpt(noisy_or, marginals), contract_cpt(noisy_or.to_array(), marginals)
+)
+print(f"Additive P(Lock-in): {np.round(contract_cpt(additive, marginals), 6)}")
+print(f"Noisy-OR P(Lock-in): {np.round(contract_cpt(noisy_or, marginals), 6)}")
+
+# %%
+rng = np.random.default_rng(0)
+n_years = 171
+for n_parents in [6, 20, 100, 500]:
+    marginals = list(rng.uniform(size=(n_parents, n_years)))
+    weights = rng.uniform(size=n_parents) / n_parents
+    for cpt in [AdditiveCPT(weights), NoisyOrCPT(weights)]:
+        elapsed = timeit.timeit(lambda: contract_cpt(cpt, marginals), number=10) / 10
+        print(
+            f"{type(cpt).__name__:>11}, {n_parents:>3} parents x {n_years} years: "
+            f"{elapsed * 1e3:7.3f} ms"
+        )
+
+# %%
@@ -0,0 +1,39 @@
+# %%
+# Check batch_lock_in against contract_cpt for every pair of CPT and node set,
+# then time a large batch under a small memory budget.
+# Run from the repository root with `python -m benchmarks.batch_lock_in`.
+import timeit
+import numpy as np
+from utils.cpt import AdditiveCPT, ConditionalTable, batch_lock_in, contract_cpt
+
+# %%
+rng = np.random.default_rng(0)
+n_nodes, n_years = 6, 171
+cpts = rng.uniform(size=(20, *(2,) * n_nodes))
+marginals = rng.uniform(size=(30, n_nodes, n_years))
+
+result = batch_lock_in(cpts, marginals, memory_budget=1 << 16)
+expected = np.array([[contract_cpt(c, list(m)) for m in marginals] for c in cpts])
+np.testing.assert_allclose(result, expected)
+
+mixed = [AdditiveCPT([0.1] * n_nodes), ConditionalTable(cpts[0])]
+np.testing.assert_allclose(
+    batch_lock_in(mixed, marginals),
+    [[contract_cpt(c, list(m)) for m in marginals] for c in mixed],
+)
+print("batch_lock_in matches contract_cpt")
+
+# %%
+for n_cpt, n_sets in [(100, 100), (1000, 1000)]:
+    cpts = rng.uniform(size=(n_cpt, *(2,) * n_nodes))
+    marginals = rng.uniform(size=(n_sets, n_nodes, n_years))
+    budget = 64 * 2**20
+    elapsed = timeit.timeit(
+        lambda: batch_lock_in(cpts, marginals, memory_budget=budget), number=1
+    )
+    print(
+        f"{n_cpt:>5} CPTs x {n_sets:>5} node sets x {n_years} years: "
+        f"{elapsed * 1e3:8.1f} ms"
+    )
+
+# %%
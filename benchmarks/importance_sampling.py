@@ -0,0 +1,48 @@
+# %%
+# Compare naive Monte Carlo over parent events with the stratified,
+# importance-sampled estimator on the main() inputs, for overall lock-in and
+# for the tail scenario where stable totalitarianism happens.
+# Run from the repository root with `python -m benchmarks.importance_sampling`.
+import numpy as np
+from forecast_inputs import load_forecast_inputs
+from utils.cpt import contract_cpt
+from utils.importance_sampling import cpt_function, importance_sample_lock_in
+
+# %%
+inputs = load_forecast_inputs()
+p = np.stack(list(inputs.values()))
+cpt = np.random.default_rng(0).uniform(size=(2,) * len(p))
+exact = contract_cpt(cpt, list(p))
+
+# Exact P(Lock-in and stable totalitarianism), the tail scenario
+st = list(inputs).index("p_stable_total")
+tail_table = cpt * (np.arange(2) == 1).reshape([2 if i == st else 1 for i in range(6)])
+exact_tail = contract_cpt(tail_table, list(p))
+
+n_samples = 10_000
+rng = np.random.default_rng(1)
+states = rng.random((n_samples, 1, len(p))) < p.T
+f = cpt_function(cpt)(states)
+naive_error = f.std(axis=0) / np.sqrt(n_samples)
+naive_tail_error = (f * states[..., st]).std(axis=0) / np.sqrt(n_samples)
+
+result = importance_sample_lock_in(cpt, inputs, n_samples=n_samples, seed=1)
+tail = result["strata"][:, result["stratified"].index("p_stable_total")]
+weighted = result["stratum_probability"][tail]
+tail_estimate = (weighted * result["stratum_estimate"][tail]).sum(axis=0)
+tail_error = np.sqrt((weighted**2 * result["stratum_std_error"][tail] ** 2).sum(axis=0))
+
+print(f"Stratified on {result['stratified']}, ESS {np.round(result['ess'])}")
+print(f"Exact P(Lock-in):       {np.round(exact, 5)}")
+print(f"Estimate:               {np.round(result['estimate'], 5)}")
+print(f"Exact P(Lock-in, ST):   {np.round(exact_tail, 7)}")
+print(f"Estimate:               {np.round(tail_estimate, 7)}")
+
+# Draws a naive run needs for the same precision, relative to this one
+for label, naive, ours in [
+    ("P(Lock-in)", naive_error, result["std_error"]),
+    ("P(Lock-in, ST)", naive_tail_error, tail_error),
+]:
+    print(f"Draw reduction, {label}: {np.round((naive / ours) ** 2)}")
+
+# %%
@@ -0,0 +1,74 @@
+# %%
+# Compare the original nested-loop lock-in calculation with the dense CPT
+# contraction. Run from the repository root with
+# `python -m benchmarks.lock_in_contraction`.
+import itertools
+import timeit
+import numpy as np
+from utils.cpt import cpt_to_array, contract_cpt
+
+
+def loop_conditional_probability(marginals, cpt):
+    # Reference implementation: the six nested loops from the original
+    # LockInForecast.calculate_conditional_probability, written over
+    # itertools.product so it works for any number of parents
+    p_lock_in = []
+    for year_idx in range(len(marginals[0])):
+        p_total = 0
+        for states in itertools.product([True, False], repeat=len(marginals)):
+            p_combination = 1
+            for p, state in zip(marginals, states):
+                p_combination *= p[year_idx] if state else (1 - p[year_idx])
+            p_total += p_combination * cpt[states]
+        p_lock_in.append(p_total)
+    return p_lock_in
+
+
+# %%
+rng = np.random.default_rng(0)
+n_parents = 6
+cpt = {
+    states: rng.uniform()
+    for states in itertools.product([True, False], repeat=n_parents)
+}
+table = cpt_to_array(cpt)
+
+for n_scenarios, n_years in [(1, 5), (1, 200), (1000, 200)]:
+    marginals = list(rng.uniform(size=(n_parents, n_scenarios, n_years)))
+
+    # Only time the loop on a single scenario and scale up, otherwise the
+    # larger grids take minutes
+    loop_inputs = [p[0] for p in marginals]
+    loop_time = timeit.timeit(
+        lambda: loop_conditional_probability(loop_inputs, cpt), number=3
+    )
+    loop_time = loop_time / 3 * n_scenarios
+
+    vectorized_time = timeit.timeit(lambda: contract_cpt(table, marginals), number=3)
+    vectorized_time = vectorized_time / 3
+
+    np.testing.assert_allclose(
+        contract_cpt(table, marginals)[0],
+        loop_conditional_probability(loop_inputs, cpt),
+    )
+
+    print(
+        f"{n_scenarios:>5} scenarios x {n_years:>3} years: "
+        f"loop {loop_time * 1e3:10.2f} ms, "
+        f"contraction {vectorized_time * 1e3:8.3f} ms, "
+        f"speedup {loop_time / vectorized_time:8.1f}x"
+    )
+
+# %%
+# Scaling with the number of parents, yearly grid to 2200
+n_years = 171
+for n_parents in [6, 8, 10, 12, 16, 20]:
+    table = rng.uniform(size=(2,) * n_parents)
+    marginals = list(rng.uniform(size=(n_parents, n_years)))
+    vectorized_time = timeit.timeit(lambda: contract_cpt(table, marginals), number=3)
+    print(
+        f"{n_parents:>2} parents x {n_years} years: "
+        f"contraction {vectorized_time / 3 * 1e3:8.3f} ms"
+    )
+
+# %%
@@ -0,0 +1,42 @@
+# %%
+# Monte Carlo throughput for the lock-in forecast. Run from the repository
+# root with `python -m benchmarks.monte_carlo`.
+import time
+from utils.cpt import AdditiveCPT
+from utils.monte_carlo import BetaNode, EmpiricalNode, LogitNormalNode, sample_lock_in
+
+# %%
+p_agi_sources = [
+    [0.08, 0.297, 0.432, 0.567, 0.702],
+    [0.12, 0.601, 0.756, 0.911, 0.9999],
+    [0.6572, 0.9334, 0.9603, 0.9697, 0.9745],
+    [0.4183, 0.8478, 0.9002, 0.9279, 0.9552],
+    [0.1, 0.5324, 0.8027, 0.9999, 0.9999],
+    [0.31, 0.648, 0.738, 0.828, 0.918],
+]
+p_alignment = [0.39715637, 0.43708259, 0.46858015, 0.49230160, 0.50954967]
+p_wwiii = [0.3000, 0.3144, 0.3861, 0.4579, 0.5297]
+p_wbe = [0.0653, 0.402, 0.5218, 0.599, 0.6549]
+p_stable_total = [0.000288, 0.000405, 0.000539, 0.000689, 0.000861]
+p_world_gov = [0.0048, 0.0161, 0.04, 0.0639, 0.0752]
+
+nodes = {
+    "agi": EmpiricalNode(p_agi_sources),
+    "misalignment": BetaNode(p_alignment),
+    "wwiii": LogitNormalNode(p_wwiii),
+    "wbe": LogitNormalNode(p_wbe),
+    "stable_total": LogitNormalNode(p_stable_total, sigma=1.0),
+    "world_gov": LogitNormalNode(p_world_gov),
+}
+additive = AdditiveCPT([0.1] * 6)
+
+n_samples = 2_000_000
+for name, cpt in [("additive", additive), ("dense", additive.to_array())]:
+    start = time.perf_counter()
+    results = sample_lock_in(cpt, nodes, n_samples, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>8} CPT: {n_samples / elapsed / 1e6:.2f}M samples/sec")
+    for level, band in zip(results["levels"], results["quantiles"]):
+        print(f"  q{level:.2f}: {band.round(4)}")
+
+# %%
@@ -0,0 +1,211 @@
+# %%
+# Command-line entry point for lock-in forecasts driven by a TOML config, e.g.
+#   python cli.py run configs/example.toml
+# Plotting, Monte Carlo and result-store modules are only imported when the
+# config asks for them, so a numbers-only run needs little more than numpy.
+import argparse
+import csv
+import json
+import os
+import sys
+import tomllib
+import numpy as np
+from typing import Dict, Optional, Sequence
+from bayesian_network import LockInForecast, plot_forecast
+from utils.cpt import AdditiveCPT, CPTLike, ConditionalTable, NoisyOrCPT
+from utils.curves import LogisticCurve, LogOddsLinearCurve, NodeCurve, PchipCurve
+
+_CURVES = {"log_odds": LogOddsLinearCurve, "pchip": PchipCurve}
+
+
+# %%
+def load_config(path: str) -> dict:
+    with open(path, "rb") as f:
+        config = tomllib.load(f)
+    config["_dir"] = os.path.dirname(os.path.abspath(path))
+    return config
+
+
+def build_node(name: str, spec: dict, derived: dict):
+    """
+    Node probabilities or curve from its config table. One of:
+        curve = "p_agi"                 derived curve from forecast_inputs.py
+        probabilities = [...]           values on the forecast years
+        anchors = {years, probabilities, interpolation = "log_odds" | "pchip"}
+        logistic = {L, k, x0}
+    """
+    if "curve" in spec:
+        if not derived:
+            from forecast_inputs import load_node_curves
+
+            derived.update(load_node_curves())
+        if spec["curve"] not in derived:
+            raise ValueError(
+                f"Node '{name}' uses unknown curve '{spec['curve']}'; "
+                f"choose from {list(derived)}"
+            )
+        return derived[spec["curve"]]
+    if "probabilities" in spec:
+        return np.asarray(spec["probabilities"], dtype=float)
+    if "anchors" in spec:
+        anchors = spec["anchors"]
+        interpolation = anchors.get("interpolation", "log_odds")
+        if interpolation not in _CURVES:
+            raise ValueError(
+                f"Node '{name}' has unknown interpolation '{interpolation}'"
+            )
+        return _CURVES[interpolation](anchors["years"], anchors["probabilities"])
+    if "logistic" in spec:
+        return LogisticCurve(**spec["logistic"])
+    raise ValueError(
+        f"Node '{name}' needs one of curve, probabilities, anchors or logistic"
+    )
+
+
+def build_cpt(spec: dict, parents: Sequence[str], config_dir: str) -> CPTLike:
+    """
+    CPT from the config table. type is one of "additive" (weights, baseline),
+    "noisy_or" (weights, leak), "table" (values in bit-packed order, first
+    parent most significant), "csv" (path) or "binary" (path written by
+    ConditionalTable.save).
+    """
+    kind = spec.get("type", "additive")
+    if kind == "additive":
+        return AdditiveCPT(spec["weights"], spec.get("baseline", 0.0))
+    if kind == "noisy_or":
+        return NoisyOrCPT(spec["weights"], spec.get("leak", 0.0))
+    if kind == "table":
+        return ConditionalTable(spec["values"], parents)
+    if kind == "csv":
+        return ConditionalTable.from_csv(os.path.join(config_dir, spec["path"]))
+    if kind == "binary":
+        return ConditionalTable.load(os.path.join(config_dir, spec["path"]))
+    raise ValueError(f"Unknown CPT type '{kind}'")
+
+
+def run(config: dict) -> Dict[str, np.ndarray]:
+    """
+    Forecast P(Lock-in) as described by a loaded config.
+
+    Returns:
+        dict: "years", the probabilities of every node and "p_lock_in", plus
+        "monte_carlo" results when the config has a [monte_carlo] table
+    """
+    years = config.get("years", [2030, 2055, 2080, 2105, 2130])
+    if not config.get("nodes"):
+        raise ValueError("Config has no [nodes.<name>] tables")
+
+    forecaster = LockInForecast(years)
+    derived: Dict[str, NodeCurve] = {}
+    for name, spec in config["nodes"].items():
+        forecaster.add_node(name, build_node(name, spec, derived))
+
+    cpt = build_cpt(config.get("cpt", {}), list(forecaster.nodes), config["_dir"])
+    nodes = forecaster.evaluate_nodes()
+    results = {"years": np.asarray(years)}
+    results.update(nodes)
+    results["p_lock_in"] = forecaster.calculate_lock_in(cpt)
+
+    if "monte_carlo" in config:
+        from utils.monte_carlo import BetaNode, sample_lock_in
+
+        spec = config["monte_carlo"]
+        distributions = {
+            name: BetaNode(p, spec.get("concentration", 20.0))
+            for name, p in nodes.items()
+        }
+        results["monte_carlo"] = sample_lock_in(
+            cpt,
+            distributions,
+            n_samples=spec.get("n_samples", 100_000),
+            quantiles=spec.get("quantiles", (0.05, 0.25, 0.5, 0.75, 0.95)),
+            seed=spec.get("seed"),
+        )
+
+    output = config.get("output", {})
+    if "store" in output:
+        from utils.results import ResultStore
+
+        store = ResultStore(
+            os.path.join(config["_dir"], output["store"]), output.get("store_format")
+        )
+        store.write_run(
+            output.get("run", "run"),
+            forecast={k: v for k, v in results.items() if k != "monte_carlo"},
+            nodes=nodes,
+            cpt=cpt,
+            monte_carlo=results.get("monte_carlo"),
+            forecast_years=years,
+        )
+    return results
+
+
+def print_results(results: Dict[str, np.ndarray], format: str = "text") -> None:
+    columns = {k: v for k, v in results.items() if k not in ("years", "monte_carlo")}
+    years = results["years"]
+
+    if format == "json":
+        out = {"years": years.tolist()}
+        out.update({name: values.tolist() for name, values in columns.items()})
+        if "monte_carlo" in results:
+            out["monte_carlo"] = {
+                name: np.asarray(values).tolist()
+                for name, values in results["monte_carlo"].items()
+            }
+        json.dump(out, sys.stdout, indent=2)
+        print()
+        return
+
+    if format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["year"] + list(columns))
+        for i, year in enumerate(years):
+            writer.writerow([year] + [repr(float(v[i])) for v in columns.values()])
+        return
+
+    for i, year in enumerate(years):
+        print(f"Year {year}:")
+        for name, values in columns.items():
+            print(f"  {name}: {values[i]:.2%}")
+        if "monte_carlo" in results:
+            mc = results["monte_carlo"]
+            bands = ", ".join(
+                f"{level:.0%} {q:.2%}"
+                for level, q in zip(mc["levels"], mc["quantiles"][:, i])
+            )
+            print(f"  p_lock_in quantiles: {bands}")
+
+
+# %%
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="formation-forecast", description="Lock-in risk forecasts"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the forecast in a config file")
+    run_parser.add_argument("config", help="path to a TOML config")
+    run_parser.add_argument(
+        "--format", choices=["text", "json", "csv"], help="overrides [output] format"
+    )
+    run_parser.add_argument(
+        "--plot",
+        action="store_true",
+        help="plot the forecast; expects the six node names used in main()",
+    )
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    results = run(config)
+    output = config.get("output", {})
+    print_results(results, args.format or output.get("format", "text"))
+
+    if args.plot or output.get("plot", False):
+        forecast = {"years": list(results["years"])}
+        for name, values in results.items():
+            if name not in ("years", "monte_carlo"):
+                forecast[name if name.startswith("p_") else f"p_{name}"] = values
+        plot_forecast(forecast)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# %%
+import numpy as np
+from typing import Dict, Optional
+from utils.cpt import ConditionalTable
+from utils.curves import LogisticCurve, LogOddsLinearCurve, NodeCurve
+from utils.geometric_mean_odds import geometric_mean_odds
+from utils.logistic_interpolation import logistic_curves
+from utils.pipeline import DEFAULT_CACHE_DIR, Pipeline
+from utils.sources import SourceRegistry
+
+FORECAST_YEARS = [2030, 2055, 2080, 2105, 2130]
+
+# Parent events of the lock-in node, in CPT order
+NODE_NAMES = [
+    "p_agi",
+    "p_misalignment",
+    "p_wwiii",
+    "p_wbe",
+    "p_stable_total",
+    "p_world_gov",
+]
+
+# Weight of each parent event in the lock-in CPT, in CPT order:
+# P(Lock-in | parents) is the sum of the weights of the events that happened
+CPT_WEIGHTS = {
+    "agi": 0.1,
+    "misalignment": 0.1,
+    "wwiii": 0.1,
+    "wbe": 0.1,
+    "stable_total": 0.1,
+    "world_gov": 0.1,
+}
+
+# %%
+# AGI source forecasts as published: probability of AGI by each anchor year,
+# with how each is interpolated and extrapolated onto FORECAST_YEARS. The
+# Metaculus forecasts are read off the community CDFs at FORECAST_YEARS.
+AGI_SOURCES = {
+    "Epoch model-based": {
+        "years": [2030, 2050, 2100],
+        "probabilities": [0.08, 0.27, 0.54],
+        "method": "linear",
+    },
+    "Epoch judgement-based": {
+        "years": [2030, 2050, 2100],
+        "probabilities": [0.12, 0.57, 0.88],
+        "method": "linear",
+    },
+    "Metaculus weakly general": {
+        "years": FORECAST_YEARS,
+        "probabilities": [0.6572, 0.9334, 0.9603, 0.9697, 0.9745],
+        "method": "linear",
+    },
+    "Metaculus general": {
+        "years": FORECAST_YEARS,
+        "probabilities": [0.4183, 0.8478, 0.9002, 0.9279, 0.9552],
+        "method": "linear",
+    },
+    # Median 10%, 50% and 90% years of the survey respondents' HLMI forecasts,
+    # held at 10% before the first of them
+    "AI Impacts HLMI": {
+        "years": [2032, 2052, 2089],
+        "probabilities": [0.1, 0.5, 0.9],
+        "method": "linear",
+        "hold_before": True,
+    },
+    "Samotsvety": {
+        "years": [2030, 2050, 2100],
+        "probabilities": [0.31, 0.63, 0.81],
+        "method": "linear",
+    },
+}
+# Extrapolated source curves stop at this probability rather than certainty,
+# which would dominate the geometric mean of odds
+AGI_CEILING = 0.9999
+# Bump a source's version when its forecaster publishes new figures
+AGI_SOURCE_VERSIONS = {name: "1" for name in AGI_SOURCES}
+
+# Expert probabilities that alignment is difficult, see alignment_difficulty.py
+ALIGNMENT_DIFFICULTY = [0.4, 0.15, 0.75, 0.65, 0.75, 0.7, 0.95, 0.5, 0.001, 0.3, 0.8]
+
+# (year, probability) anchors for World War III
+WWIII_ANCHORS = [[2050, 2151], [0.3, 0.59]]
+
+# (target year, target probability, growth rate) for Bryan Caplan's and
+# Stephen Clare's stable totalitarianism forecasts
+STABLE_TOTAL_FORECASTS = [[3011, 0.05, 0.0161], [2124, 0.0003, 0.03]]
+
+WBE = [0.0653, 0.402, 0.5218, 0.599, 0.6549]
+WORLD_GOV = [0.0048, 0.0161, 0.04, 0.0639, 0.0752]
+
+
+# %%
+def aggregate_sources(sources: np.ndarray) -> np.ndarray:
+    # Geometric mean of odds across sources for each year
+    return geometric_mean_odds(sources, axis=0)
+
+
+def aggregate_point(values: np.ndarray) -> float:
+    return geometric_mean_odds(values)
+
+
+def logistic_series(target_prob: np.ndarray, years, target_year, k) -> np.ndarray:
+    return logistic_curves(years, target_year, target_prob, k)
+
+
+def interpolate_series(anchors: np.ndarray, years) -> np.ndarray:
+    return np.interp(years, anchors[0], anchors[1])
+
+
+def aggregate_logistic_forecasts(forecasts: np.ndarray, years) -> np.ndarray:
+    # As in stable_totalitarianism.py, the odds are pooled over the
+    # percentage values of each forecast
+    target_year, target_prob, k = forecasts.T
+    percentages = logistic_curves(years, target_year, target_prob, k) * 100
+    return aggregate_sources(percentages)
+
+
+# %%
+def build_source_registry(
+    pipeline: Optional[Pipeline] = None,
+) -> SourceRegistry:
+    """
+    Registry of the per-forecaster sources, with their curves and aggregates
+    as nodes of the pipeline.
+    """
+    registry = SourceRegistry(FORECAST_YEARS, pipeline)
+    for name, source in AGI_SOURCES.items():
+        registry.register(
+            "p_agi",
+            name,
+            version=AGI_SOURCE_VERSIONS[name],
+            ceiling=AGI_CEILING,
+            **source,
+        )
+    return registry
+
+
+def build_pipeline(cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Pipeline:
+    """
+    Pipeline deriving every lock-in parent series from its source forecasts.
+    """
+    pipeline = Pipeline(cache_dir)
+
+    build_source_registry(pipeline)
+
+    pipeline.source("alignment_forecasts", ALIGNMENT_DIFFICULTY)
+    pipeline.node("alignment_difficulty", aggregate_point, ["alignment_forecasts"])
+    pipeline.node(
+        "p_misalignment",
+        logistic_series,
+        ["alignment_difficulty"],
+        years=FORECAST_YEARS,
+        target_year=2070,
+        k=0.0161,
+    )
+
+    pipeline.source("wwiii_anchors", WWIII_ANCHORS)
+    pipeline.node(
+        "p_wwiii", interpolate_series, ["wwiii_anchors"], years=FORECAST_YEARS
+    )
+
+    pipeline.source("p_wbe", WBE)
+
+    pipeline.source("stable_total_forecasts", STABLE_TOTAL_FORECASTS)
+    pipeline.node(
+        "p_stable_total",
+        aggregate_logistic_forecasts,
+        ["stable_total_forecasts"],
+        years=FORECAST_YEARS,
+    )
+
+    pipeline.source("p_world_gov", WORLD_GOV)
+
+    return pipeline
+
+
+def load_forecast_inputs(pipeline: Optional[Pipeline] = None) -> Dict[str, np.ndarray]:
+    """
+    Probabilities of every lock-in parent event over FORECAST_YEARS, in CPT
+    order.
+    """
+    if pipeline is None:
+        pipeline = build_pipeline()
+    return {name: pipeline.get(name) for name in NODE_NAMES}
+
+
+def load_cpt() -> ConditionalTable:
+    """
+    The lock-in CPT built from CPT_WEIGHTS, as used for the headline forecast.
+    """
+    return ConditionalTable.from_weights(
+        list(CPT_WEIGHTS.values()), parents=list(CPT_WEIGHTS)
+    )
+
+
+def load_node_curves(pipeline: Optional[Pipeline] = None) -> Dict[str, NodeCurve]:
+    """
+    Continuous curves for every lock-in parent event, in CPT order, for
+    forecasting on grids other than FORECAST_YEARS.
+
+    Misalignment keeps its logistic form. The other nodes are only known on
+    FORECAST_YEARS, so they are interpolated linearly in log-odds and
+    extrapolated along their end segments.
+    """
+    if pipeline is None:
+        pipeline = build_pipeline()
+    inputs = load_forecast_inputs(pipeline)
+
+    curves = {
+        name: LogOddsLinearCurve(FORECAST_YEARS, probabilities)
+        for name, probabilities in inputs.items()
+    }
+    alignment_difficulty = float(pipeline.get("alignment_difficulty"))
+    curves["p_misalignment"] = LogisticCurve(
+        L=1.2 * alignment_difficulty, k=0.0161, x0=2070 - 100
+    )
+    return curves
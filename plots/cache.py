@@ -0,0 +1,87 @@
+# %%
+import hashlib
+import json
+import os
+import shutil
+from importlib.metadata import version
+from typing import List, Optional, Sequence
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache", "figures")
+
+
+# %%
+class FigureCache:
+    """
+    On-disk cache of rendered figures keyed by a hash of the figure spec (which
+    holds the plotted data and style), the output formats and dpi, and the
+    matplotlib version.
+
+    Each entry is a directory of rendered files. Entries are touched when used
+    and the least recently used ones are evicted once there are more than
+    max_entries.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries
+        max_entries (int): Maximum number of cached figures
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(spec: dict, formats: Sequence[str], dpi: int) -> str:
+        description = json.dumps(
+            {
+                "spec": spec,
+                "formats": sorted(formats),
+                "dpi": dpi,
+                "matplotlib": version("matplotlib"),
+            },
+            sort_keys=True,
+            default=list,
+        )
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Directory of the cached files for key, or None on a miss.
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry):
+            return None
+        os.utime(entry)
+        return entry
+
+    def store(self, key: str, paths: Sequence[str]) -> str:
+        """
+        Copy freshly rendered files into the cache and evict old entries.
+        """
+        entry = os.path.join(self.cache_dir, key)
+        tmp_entry = entry + ".tmp"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        for path in paths:
+            shutil.copy2(path, tmp_entry)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_entry, entry)
+
+        self.evict()
+        return entry
+
+    def evict(self) -> List[str]:
+        """
+        Remove the least recently used entries beyond max_entries.
+        """
+        # Nothing has been stored yet, or the cache was deleted by hand
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if not name.endswith(".tmp")
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for entry in entries[self.max_entries :]:
+            shutil.rmtree(entry, ignore_errors=True)
+        return entries[self.max_entries :]
@@ -0,0 +1,422 @@
+# %%
+# Render every report figure from declarative specs. Run from the repository
+# root, e.g. `python -m plots.figures --out figures --format png svg`.
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from forecast_inputs import ALIGNMENT_DIFFICULTY, FORECAST_YEARS
+from plots.cache import FigureCache
+
+# Alignment difficulty forecasters, in the order of ALIGNMENT_DIFFICULTY
+ALIGNMENT_FORECASTERS = [
+    "Leopold Aschenbrenner",
+    "Ben Garfinkel",
+    "Daniel Kokotajlo",
+    "Ben Levinstein",
+    "Eli Lifland",
+    "Neel Nanda",
+    "Nate Soares",
+    "Christian Tarsney",
+    "David Thorstad",
+    "David Wallace",
+    "Anonymous 1",
+]
+
+
+# %%
+def _probability_figure(name, title, curves, points=(), ylim=(0, 1), xticks=None):
+    return {
+        "name": name,
+        "kind": "line",
+        "title": title,
+        "curves": list(curves),
+        "points": list(points),
+        "ylim": ylim,
+        "xticks": list(FORECAST_YEARS) if xticks is None else xticks,
+    }
+
+
+def _curve(values, label=None, color="blue", smooth="spline", years=None):
+    years = FORECAST_YEARS if years is None else years
+    return {
+        "years": list(years),
+        "values": [float(v) for v in values],
+        "label": label,
+        "color": color,
+        "smooth": smooth,
+    }
+
+
+def _points(values, label=None, color="purple", years=None, marker="x", size=None):
+    years = FORECAST_YEARS if years is None else years
+    return {
+        "years": list(years),
+        "values": [float(v) for v in values],
+        "label": label,
+        "color": color,
+        "marker": marker,
+        "size": size,
+    }
+
+
+def build_specs() -> List[dict]:
+    """
+    Declarative specs for every report figure, with data pulled from the
+    forecast input pipeline.
+    """
+    from forecast_inputs import build_source_registry, load_cpt, load_forecast_inputs
+    from utils.cpt import contract_cpt
+    from utils.geometric_mean_odds import geometric_mean_odds
+
+    inputs = load_forecast_inputs()
+    registry = build_source_registry()
+    agi = registry.curves("p_agi")
+    interpolated = "Interpolated & Extrapolated Probabilities"
+
+    def anchors(name, label=None, color="orange"):
+        # A source's forecasts as published, before regridding
+        years, probabilities = registry.anchors("p_agi", name)
+        return _points(probabilities, label, color, years.tolist())
+
+    specs = [
+        _probability_figure(
+            "ai_impacts",
+            "AI Impacts HLMI Probabilities",
+            [_curve(agi["AI Impacts HLMI"])],
+            [
+                anchors("AI Impacts HLMI", "Median Survey Probabilities", "green"),
+                _points(agi["AI Impacts HLMI"], interpolated),
+            ],
+            ylim=(0, 1.1),
+        ),
+        _probability_figure(
+            "epoch_agi_tai",
+            "Epoch Literature Review AGI/TAI Probabilities",
+            [
+                _curve(agi["Epoch model-based"], "Model-Based Averages"),
+                _curve(
+                    agi["Epoch judgement-based"], "Judgement-Based Averages", "green"
+                ),
+            ],
+            [
+                anchors("Epoch model-based", "Original Averages"),
+                _points(
+                    agi["Epoch model-based"], "Interpolated & Extrapolated Averages"
+                ),
+                anchors("Epoch judgement-based"),
+                _points(agi["Epoch judgement-based"]),
+            ],
+        ),
+        _probability_figure(
+            "metaculus",
+            "Metaculus AGI Probabilities",
+            [
+                _curve(agi["Metaculus weakly general"], "Weakly General AI"),
+                _curve(agi["Metaculus general"], "General AI", "green"),
+            ],
+            [
+                _points(agi["Metaculus weakly general"], "Probabilities"),
+                _points(agi["Metaculus general"]),
+            ],
+        ),
+        _probability_figure(
+            "samotsvety",
+            "Samotsvety AGI Probabilities",
+            [_curve(agi["Samotsvety"])],
+            [
+                anchors("Samotsvety", "Original Probabilities"),
+                _points(agi["Samotsvety"], interpolated),
+            ],
+        ),
+        _probability_figure(
+            "averages",
+            "Average AGI Probabilities",
+            [_curve(inputs["p_agi"], "Average AGI", smooth="pchip")],
+            [_points(inputs["p_agi"], "Probabilities")],
+        ),
+        {
+            "name": "alignment_difficulty_predictions",
+            "kind": "bar",
+            "title": "Alignment Difficulty Predictions",
+            "names": ALIGNMENT_FORECASTERS + ["Average"],
+            "values": list(ALIGNMENT_DIFFICULTY)
+            + [round(float(geometric_mean_odds(ALIGNMENT_DIFFICULTY)), 4)],
+            "color": "#6D5ACF",
+            "ylim": (0, 1),
+        },
+        _probability_figure(
+            "alignment_difficulty",
+            "Interpolated Alignment Difficulty Probabilities",
+            [_curve(inputs["p_misalignment"], "Alignment Difficulty")],
+            [_points(inputs["p_misalignment"], "Probabilities")],
+        ),
+        _probability_figure(
+            "world_war_iii",
+            "World War III Probabilities",
+            [_curve(inputs["p_wwiii"])],
+            [
+                _points([0.3, 0.59], "Original Probabilities", "orange", [2050, 2151]),
+                _points(inputs["p_wwiii"], interpolated),
+            ],
+            xticks=list(FORECAST_YEARS) + [2151],
+        ),
+        _probability_figure(
+            "whole_brain_emulation",
+            "Metaculus Whole Brain Emulation Probabilities",
+            [_curve(inputs["p_wbe"], "First Whole Brain Emulation")],
+            [_points(inputs["p_wbe"], "Probabilities")],
+        ),
+        _probability_figure(
+            "stable_totalitarianism",
+            "Average Stable Totalitarianism Probabilities",
+            [_curve(inputs["p_stable_total"], "Stable Totalitarianism")],
+            [_points(inputs["p_stable_total"], "Probabilities")],
+            ylim=(0, 0.01),
+        ),
+        _probability_figure(
+            "world_government",
+            "Interpolated World Government Probabilities",
+            [_curve(inputs["p_world_gov"], "World Government")],
+            [_points(inputs["p_world_gov"], "Probabilities")],
+        ),
+    ]
+
+    # Lock-in forecast with the CPT used by main(), drawn over its parents
+    p_lock_in = contract_cpt(load_cpt(), list(inputs.values()))
+    specs.append(
+        _probability_figure(
+            "lock_in_forecast",
+            "Lock-in Forecast Plotted with Conditional Probabilities",
+            [
+                dict(_curve(p, color="grey", smooth="pchip"), alpha=0.2, linestyle="--")
+                for p in inputs.values()
+            ]
+            + [dict(_curve(p_lock_in, "Lock-in", "green", "pchip"), linewidth=2)],
+            [
+                dict(_points(p, color="grey", marker="o", size=20), alpha=0.2)
+                for p in inputs.values()
+            ]
+            + [_points(p_lock_in, "Probabilities", "green", marker="^", size=50)],
+        )
+    )
+
+    return specs
+
+
+# %%
+def _init_worker():
+    # Select the non-interactive backend before pyplot is imported, so each
+    # worker pays the matplotlib import and font cache cost once
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _smooth(years, values, method):
+    import numpy as np
+
+    years_smooth = np.linspace(min(years), max(years), 500)
+    if method == "pchip":
+        from scipy.interpolate import PchipInterpolator
+
+        return years_smooth, np.clip(
+            PchipInterpolator(years, values)(years_smooth), 0, 1
+        )
+    if method == "spline":
+        from scipy.interpolate import make_interp_spline
+
+        return years_smooth, make_interp_spline(years, values, k=3)(years_smooth)
+    return years, values
+
+
+def render_figure(
+    spec: dict, out_dir: str, formats: Sequence[str] = ("png",), dpi: int = 300
+) -> List[str]:
+    """
+    Draw one figure spec and save it in each of the given formats.
+
+    Returns:
+        list: Paths of the written files
+    """
+    _init_worker()
+    import matplotlib.pyplot as plt
+
+    if spec["kind"] == "bar":
+        fig, ax = plt.subplots(figsize=spec.get("figsize", (12, 6)), dpi=dpi)
+        bars = ax.bar(spec["names"], spec["values"], color=spec["color"])
+        ax.set_ylabel("Probability", fontsize=12)
+        ax.set_title(spec["title"], fontsize=14)
+        ax.set_ylim(*spec["ylim"])
+        plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(
+                bar.get_x() + bar.get_width() / 2.0,
+                height,
+                f"{height:.3f}",
+                ha="center",
+                va="bottom",
+            )
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.spines["left"].set_linewidth(1.5)
+        ax.spines["bottom"].set_linewidth(1.5)
+    else:
+        fig, ax = plt.subplots(figsize=spec.get("figsize", (6, 4)), dpi=dpi)
+        for curve in spec["curves"]:
+            x, y = _smooth(curve["years"], curve["values"], curve["smooth"])
+            ax.plot(
+                x,
+                y,
+                label=curve["label"],
+                color=curve["color"],
+                alpha=curve.get("alpha"),
+                linestyle=curve.get("linestyle", "-"),
+                linewidth=curve.get("linewidth"),
+            )
+        for points in spec["points"]:
+            ax.scatter(
+                points["years"],
+                points["values"],
+                label=points["label"],
+                color=points["color"],
+                marker=points["marker"],
+                s=points["size"],
+                alpha=points.get("alpha"),
+            )
+        ax.set_title(spec["title"])
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Probability")
+        ax.legend()
+        ax.grid(True, linestyle="--", alpha=0.7)
+        ax.set_ylim(*spec["ylim"])
+        ax.set_xticks(spec["xticks"])
+
+    fig.tight_layout()
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{spec['name']}.{fmt}")
+        fig.savefig(path, format=fmt)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+
+def render_all(
+    specs: Sequence[dict],
+    out_dir: str,
+    formats: Sequence[str] = ("png",),
+    dpi: int = 300,
+    max_workers: Optional[int] = None,
+    cache: Optional[FigureCache] = None,
+) -> Dict[str, dict]:
+    """
+    Render figure specs in parallel across a pool of worker processes.
+
+    With a FigureCache, figures whose spec is unchanged since they were last
+    written to out_dir are skipped, figures rendered before are copied back
+    from the cache, and only the rest are drawn.
+
+    Returns:
+        dict: Figure name to its "paths" and "status", one of "skipped",
+        "cached" or "rendered"
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, ".figures.json")
+    manifest = {}
+    if cache is not None and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    results = {}
+    to_render = []
+    for spec in specs:
+        name = spec["name"]
+        paths = [os.path.join(out_dir, f"{name}.{fmt}") for fmt in formats]
+        if cache is None:
+            to_render.append(spec)
+            continue
+
+        key = cache.key(spec, formats, dpi)
+        entry = cache.lookup(key)
+        if manifest.get(name) == key and all(os.path.exists(p) for p in paths):
+            results[name] = {"paths": paths, "status": "skipped"}
+        elif entry is not None:
+            for path in paths:
+                shutil.copy2(os.path.join(entry, os.path.basename(path)), path)
+            results[name] = {"paths": paths, "status": "cached"}
+        else:
+            to_render.append(spec)
+        manifest[name] = key
+
+    if to_render:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker
+        ) as executor:
+            futures = {
+                spec["name"]: executor.submit(
+                    render_figure, spec, out_dir, formats, dpi
+                )
+                for spec in to_render
+            }
+            for spec in to_render:
+                paths = futures[spec["name"]].result()
+                if cache is not None:
+                    cache.store(manifest[spec["name"]], paths)
+                results[spec["name"]] = {"paths": paths, "status": "rendered"}
+
+    if cache is not None:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        cache.evict()
+
+    return {spec["name"]: results[spec["name"]] for spec in specs}
+
+
+# %%
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Render the report figures")
+    parser.add_argument("--out", default="figures", help="output directory")
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        default=["png"],
+        choices=["png", "svg", "pdf"],
+        help="file formats to write",
+    )
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--only", nargs="+", help="names of figures to render")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="redraw every figure from scratch"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=256, help="maximum cached figures"
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    specs = build_specs()
+    if args.only:
+        specs = [spec for spec in specs if spec["name"] in args.only]
+
+    cache = None if args.no_cache else FigureCache(max_entries=args.cache_size)
+    results = render_all(specs, args.out, args.format, args.dpi, args.workers, cache)
+    for name, result in results.items():
+        print(f"{name} ({result['status']}): {', '.join(result['paths'])}")
+
+    rendered = sum(result["status"] == "rendered" for result in results.values())
+    print(
+        f"Rendered {rendered} of {len(results)} figures "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # %%
-from utils.logistic_interpolation import get_logistic_interpolation
-from utils.geometric_mean_odds import get_geometric_mean, odds_to_probability
+from utils.logistic_interpolation import get_logistic_interpolation, logistic_curves
+from utils.geometric_mean_odds import geometric_mean_odds
+from utils.logistic_fit import fit_logistic, logistic
 import pandas as pd
 
 # %%
@@ -19,13 +20,20 @@ print("\nProbabilities for world government:")
 print(gov_distribution.to_string(index=False))
 
 # Verify we hit close to our target probability
-target_year = get_logistic_interpolation(
-    [original_year], original_year, original_prob, k
-)
+target_year = logistic_curves([original_year], original_year, original_prob, k)
 print(
-    f"\nProbability for 2100 (should be close to {original_prob*100}%): {target_year['probability_percentage'].iloc[0]:.2f}%"
+    f"\nProbability for 2100 (should be close to {original_prob*100}%): {target_year[0] * 100:.2f}%"
 )
 
+# %%
+# Calibrate (L, k, x0) so the curve passes through the anchor, instead of the
+# fixed cap and midpoint used above
+fit = fit_logistic([original_year], [original_prob], k_prior=k)
+calibrated = logistic(years + [original_year], fit["L"], fit["k"], fit["x0"])
+print(f"\nCalibrated L={fit['L']:.4f}, k={fit['k']:.4f}, x0={fit['x0']:.1f}")
+print(f"Calibrated probabilities: {calibrated[:-1].round(4)}")
+print(f"Calibrated probability for {original_year}: {calibrated[-1] * 100:.2f}%")
+
 # %%
 # Estimate Distribution for Stable Totalitarianism with Bryan Caplan's
 # prection
@@ -43,11 +51,9 @@ print("\nProbabilities for stable totalitarianism:")
 print(bryan_distribution.to_string(index=False))
 
 # Verify we hit close to our target probability
-target_year = get_logistic_interpolation(
-    [original_year], original_year, original_prob, k
-)
+target_year = logistic_curves([original_year], original_year, original_prob, k)
 print(
-    f"\nProbability for {original_year} (should be close to {original_prob*100}%): {target_year['probability_percentage'].iloc[0]:.2f}%"
+    f"\nProbability for {original_year} (should be close to {original_prob*100}%): {target_year[0] * 100:.2f}%"
 )
 
 # %%
@@ -69,11 +75,9 @@ print("\nProbabilities for stable totalitarianism:")
 print(stephen_distribution.to_string(index=False))
 
 # Verify we hit close to our target probability
-target_year = get_logistic_interpolation(
-    [original_year], original_year, original_prob, k
-)
+target_year = logistic_curves([original_year], original_year, original_prob, k)
 print(
-    f"\nProbability for {original_year} (should be close to {original_prob*100}%): {target_year['probability_percentage'].iloc[0]:.2f}%"
+    f"\nProbability for {original_year} (should be close to {original_prob*100}%): {target_year[0] * 100:.2f}%"
 )
 # %%
 # Get geometric mean of odds for Bryan and Stephen distributions
@@ -91,13 +95,10 @@ combined_df = pd.merge(
     on="year",
 )
 
-combined_df["geometric_mean_odds"] = combined_df.apply(
-    lambda row: odds_to_probability(
-        get_geometric_mean(
-            [row["bryan_probability_percentage"], row["stephen_probability_percentage"]]
-        )
-    ),
-    axis=1,
+combined_df["geometric_mean_odds"] = geometric_mean_odds(
+    combined_df[
+        ["bryan_probability_percentage", "stephen_probability_percentage"]
+    ].to_numpy()
 )
 
 # Print the combined DataFrame
@@ -1,39 +1,135 @@
 # %%
+import os
+import numpy as np
 import pandas as pd
+from typing import Dict, Iterator, Sequence
+
+SURVEY_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "ai_impacts.csv")
+SURVEY_COLUMNS = [
+    "years_until_10_percent",
+    "years_until_50_percent",
+    "years_until_90_percent",
+]
+SURVEY_YEAR = 2022
 
-# %%
-## Get AI impacts distributions
-df = pd.read_csv("../data/ai_impacts.csv")
-print(df.head)
 
 # %%
-## Convert to numeric values
+def read_survey_chunks(
+    path: str = SURVEY_PATH, chunksize: int = 1_000_000
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Stream the AI Impacts survey export in fixed-size chunks.
 
-df = df.apply(pd.to_numeric, errors="coerce")
-print(df.head)
+    Each chunk is parsed straight into float32 columns. "never" answers become
+    infinity and blank or malformed answers become NaN.
 
-# %%
-## Handle special values
-df = df.replace("never", float("inf"))
-print(df.head)
+    Args:
+        path (str): Path to the survey CSV
+        chunksize (int): Number of rows per chunk
+
+    Yields:
+        dict: Column name to a float32 array for the rows in the chunk
+    """
+    reader = pd.read_csv(
+        path, usecols=SURVEY_COLUMNS, dtype=str, chunksize=chunksize, engine="c"
+    )
+    for chunk in reader:
+        columns = {}
+        for name in SURVEY_COLUMNS:
+            raw = chunk[name]
+            values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float32)
+            values[(raw.str.strip().str.lower() == "never").to_numpy(dtype=bool)] = (
+                np.inf
+            )
+            columns[name] = values
+        yield columns
+
+
+class StreamingQuantiles:
+    """
+    Exact quantiles of a stream of values, kept as counts of distinct values.
+
+    Survey answers are whole numbers of years, so the number of distinct
+    values, and hence memory, stays small however many rows are read. NaNs are
+    ignored and infinities are kept.
+    """
+
+    def __init__(self):
+        self.counts: Dict[float, int] = {}
+        self.n = 0
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        unique, counts = np.unique(values, return_counts=True)
+        for value, count in zip(unique.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.n += len(values)
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantile with linear interpolation between order statistics, matching
+        numpy.quantile and pandas.Series.median.
+        """
+        if self.n == 0:
+            return float("nan")
+        values = np.array(sorted(self.counts))
+        cumulative = np.cumsum([self.counts[v] for v in values])
+
+        position = (self.n - 1) * q
+        lower = values[np.searchsorted(cumulative, np.floor(position), side="right")]
+        upper = values[np.searchsorted(cumulative, np.ceil(position), side="right")]
+        if lower == upper:
+            return float(lower)
+        return float(lower + (position - np.floor(position)) * (upper - lower))
+
+
+def get_survey_quantiles(
+    path: str = SURVEY_PATH,
+    quantiles: Sequence[float] = (0.5,),
+    chunksize: int = 1_000_000,
+) -> Dict[str, Dict[float, float]]:
+    """
+    Single-pass quantiles of every survey column.
+
+    Returns:
+        dict: Column name to a mapping of quantile level to value
+    """
+    sketches = {name: StreamingQuantiles() for name in SURVEY_COLUMNS}
+    for chunk in read_survey_chunks(path, chunksize):
+        for name, values in chunk.items():
+            sketches[name].update(values)
+
+    return {
+        name: {q: sketch.quantile(q) for q in quantiles}
+        for name, sketch in sketches.items()
+    }
 
-# %%
-## Remove any row that has no values for any of the columns
-df = df.dropna(how="all")
-print(df.head)
 
 # %%
-median_10_percent = df["years_until_10_percent"].median()
-median_50_percent = df["years_until_50_percent"].median()
-median_90_percent = df["years_until_90_percent"].median()
+def main():
+    medians = get_survey_quantiles()
+    median_10_percent = medians["years_until_10_percent"][0.5]
+    median_50_percent = medians["years_until_50_percent"][0.5]
+    median_90_percent = medians["years_until_90_percent"][0.5]
+
+    print(f"Median number of years for 10% probability of HLMI: {median_10_percent}")
+    print(f"Median number of years for 50% probability of HLMI: {median_50_percent}")
+    print(f"Median number of years for 90% probability of HLMI: {median_90_percent}")
+
+    ## Calculate year after AI Impacts survey each median represents
+    for percent, median in [
+        (10, median_10_percent),
+        (50, median_50_percent),
+        (90, median_90_percent),
+    ]:
+        print(
+            f"AI Impacts simplistic probability of HLMI by "
+            f"{SURVEY_YEAR + median}: {percent}%"
+        )
 
-print(f"Median number of years for 10% probability of HLMI: {median_10_percent}")
-print(f"Median number of years for 50% probability of HLMI: {median_50_percent}")
-print(f"Median number of years for 90% probability of HLMI: {median_90_percent}")
 
 # %%
-## Calculate year after AI Impacts survey each median represents
-print(f"AI Impacts simplistic probability of HLMI by {2022 + median_10_percent}: 10%")
-print(f"AI Impacts simplistic probability of HLMI by {2022 + median_50_percent}: 50%")
-print(f"AI Impacts simplistic probability of HLMI by {2022 + median_90_percent}: 90%")
+if __name__ == "__main__":
+    main()
+
 # %%
@@ -0,0 +1,117 @@
+# %%
+import threading
+import numpy as np
+from typing import Dict, FrozenSet, Iterable, Optional
+from numpy.typing import ArrayLike
+from utils.cpt import CPTLike, to_dense
+from utils.sensitivity import lock_in_gradients
+
+
+# %%
+class CompiledForecast:
+    """
+    A CPT and a set of node probabilities on a fixed year grid, precompiled so
+    that forecasts which change only a few nodes are cheap.
+
+    For every node the CPT is contracted over all the other nodes once, into a
+    leave-one-out table of shape (2, n_years); all of these come from the
+    single forward pass of lock_in_gradients. Replacing one node's curve then
+    costs O(n_years). Tables for replacing several nodes at once are built on
+    first use, by contracting the CPT over the nodes that stay fixed, and
+    cached per set of replaced nodes.
+
+    The compiled state is never modified after construction, and the lazy
+    cache is guarded by a lock, so one instance can serve many threads.
+
+    Args:
+        cpt: CPT in the same parent order as nodes
+        nodes (dict): Ordered mapping of node names to probabilities on the
+            year grid, shape (n_years,)
+    """
+
+    def __init__(self, cpt: CPTLike, nodes: Dict[str, ArrayLike]):
+        self.names = tuple(nodes)
+        self._table = np.array(to_dense(cpt), dtype=float)
+        self._marginals = np.stack([np.asarray(p, dtype=float) for p in nodes.values()])
+        if self._marginals.ndim != 2:
+            raise ValueError("Compiled nodes must each have shape (n_years,)")
+
+        gradients = lock_in_gradients(self._table, list(self._marginals))
+        self._value = np.array(gradients["value"])
+
+        # P = L[0] * (1 - p_i) + L[1] * p_i, with L[1] - L[0] = dP/dp_i
+        slopes = gradients["marginals"]
+        without = self._value - self._marginals * slopes
+        self._cache: Dict[FrozenSet[str], np.ndarray] = {
+            frozenset([name]): np.stack([without[i], without[i] + slopes[i]])
+            for i, name in enumerate(self.names)
+        }
+        self._cache[frozenset()] = self._value
+        for array in [self._table, self._marginals, self._value, *self._cache.values()]:
+            array.flags.writeable = False
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> np.ndarray:
+        """
+        P(Lock-in) with the compiled node probabilities.
+        """
+        return self._value
+
+    def partial_table(self, free: Iterable[str]) -> np.ndarray:
+        """
+        The CPT contracted over every node not in free, with the free nodes'
+        axes in compiled order followed by the year axis.
+        """
+        free = frozenset(free)
+        table = self._cache.get(free)
+        if table is not None:
+            return table
+
+        unknown = free - set(self.names)
+        if unknown:
+            raise KeyError(f"Unknown nodes {sorted(unknown)}")
+        free_axes = [i for i, name in enumerate(self.names) if name in free]
+        fixed_axes = [i for i in range(len(self.names)) if i not in free_axes]
+
+        # Contract the fixed nodes, leaving the free axes and the years
+        table = np.transpose(self._table, fixed_axes + free_axes)
+        table = table.reshape(table.shape + (1,))
+        for i in fixed_axes:
+            p = self._marginals[i]
+            table = table[0] * (1 - p) + table[1] * p
+        table = np.ascontiguousarray(
+            np.broadcast_to(table, (2,) * len(free_axes) + self._value.shape)
+        )
+        table.flags.writeable = False
+
+        with self._lock:
+            return self._cache.setdefault(free, table)
+
+    def evaluate(self, updates: Optional[Dict[str, ArrayLike]] = None) -> np.ndarray:
+        """
+        P(Lock-in) with some node probabilities replaced.
+
+        Args:
+            updates (dict, optional): Node name to new probabilities, shape
+                (n_years,) or (n_scenarios, n_years)
+
+        Returns:
+            numpy.ndarray: P(Lock-in) with the broadcast shape of the updates
+        """
+        if not updates:
+            return self._value
+        free = [name for name in self.names if name in updates]
+        if len(free) != len(updates):
+            raise KeyError(f"Unknown nodes {sorted(set(updates) - set(free))}")
+
+        marginals = np.broadcast_arrays(
+            *[np.asarray(updates[name], dtype=float) for name in free]
+        )
+        table = self.partial_table(free)
+        table = table.reshape(
+            (2,) * len(free) + (1,) * (marginals[0].ndim - 1) + self._value.shape
+        )
+        for p in marginals:
+            table = table[0] * (1 - p) + table[1] * p
+        return table
@@ -0,0 +1,384 @@
+# %%
+import csv
+import itertools
+import json
+import struct
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+
+def cpt_to_array(cpt: Dict[Tuple[bool, ...], float]) -> np.ndarray:
+    """
+    Convert a tuple-keyed conditional probability table into a dense array.
+
+    Args:
+        cpt (dict): Mapping from tuples of parent states to P(Lock-in | parents)
+
+    Returns:
+        numpy.ndarray: Array of shape (2,) * n_parents where index 1 means the
+        parent event happened and index 0 means it did not
+    """
+    n_parents = len(next(iter(cpt)))
+    table = np.empty((2,) * n_parents)
+    for states in itertools.product([False, True], repeat=n_parents):
+        table[tuple(int(s) for s in states)] = cpt[states]
+    return table
+
+
+def to_dense(cpt: "CPTLike") -> np.ndarray:
+    """
+    Dense array of shape (2,) * n_parents for any supported CPT: tuple-keyed
+    dicts are converted, arrays returned as they are and ConditionalTable,
+    AdditiveCPT and NoisyOrCPT expanded with to_array().
+    """
+    if isinstance(cpt, dict):
+        return cpt_to_array(cpt)
+    if isinstance(cpt, np.ndarray):
+        return cpt
+    return cpt.to_array()
+
+
+def contract_cpt(
+    table: "CPTLike",
+    marginals: Sequence[np.ndarray],
+) -> np.ndarray:
+    """
+    Marginalise a CPT over independent parents one variable at a time.
+
+    Additive and noisy-OR CPTs are evaluated in closed form in O(n_parents)
+    without building the dense table.
+
+    Args:
+        table (dict, numpy.ndarray, ConditionalTable, AdditiveCPT or NoisyOrCPT):
+            Dense CPT of shape (2,) * n_parents, or a parametric CPT
+        marginals (list): One probability array per parent, in the same order
+            as the table axes, each of shape (n_years,) or (n_scenarios, n_years)
+
+    Returns:
+        numpy.ndarray: P(Lock-in) with the broadcast shape of the marginals
+    """
+    if isinstance(table, (dict, ConditionalTable)):
+        table = to_dense(table)
+    parametric = isinstance(table, (AdditiveCPT, NoisyOrCPT))
+    n_parents = table.n_parents if parametric else table.ndim
+    if n_parents != len(marginals):
+        raise ValueError(
+            f"CPT has {n_parents} parents but {len(marginals)} marginals were given"
+        )
+
+    marginals = np.broadcast_arrays(*[np.asarray(p, dtype=float) for p in marginals])
+    if parametric:
+        return table.marginal(marginals)
+
+    batch_shape = marginals[0].shape if marginals else ()
+
+    # Keep the batch dimensions after the parent axes, so contracting the
+    # leading parent halves the table each step and the whole pass costs
+    # O(2^n) per year rather than O(n * 2^n)
+    result = table.reshape(table.shape + (1,) * len(batch_shape))
+    for p in marginals:
+        result = result[0] * (1 - p) + result[1] * p
+
+    return result
+
+
+class ConditionalTable:
+    """
+    P(Lock-in | parents) stored as one contiguous float64 array with an entry
+    for every combination of parent states.
+
+    Parent states are bit-packed into the index with the first parent as the
+    most significant bit, so the flat array reshaped to (2,) * n_parents is
+    exactly the dense table that contract_cpt uses, without a copy. Tables are
+    checked for completeness and for values in [0, 1] when they are built.
+
+    Args:
+        values (array-like): 2 ** n_parents probabilities in bit-packed order,
+            or a dense array of shape (2,) * n_parents
+        parents (list, optional): Names of the parent events, in bit order
+    """
+
+    _MAGIC = b"CPT1"
+
+    def __init__(self, values: np.ndarray, parents: Optional[Sequence[str]] = None):
+        values = np.array(values, dtype=np.float64).ravel()
+        n_parents = int(np.log2(max(len(values), 1)))
+        if len(values) != 1 << n_parents:
+            raise ValueError(f"A table needs 2 ** n_parents entries, not {len(values)}")
+        if parents is not None and len(parents) != n_parents:
+            raise ValueError(
+                f"Table has {n_parents} parents but {len(parents)} names were given"
+            )
+        if np.any(np.isnan(values)):
+            raise ValueError("Table contains NaN entries")
+        if np.any((values < 0) | (values > 1)):
+            bad = np.flatnonzero((values < 0) | (values > 1))
+            raise ValueError(
+                f"Probabilities must be in [0, 1]; entries {bad.tolist()} are not"
+            )
+
+        values.flags.writeable = False
+        self.values = values
+        self.n_parents = n_parents
+        self.parents = None if parents is None else tuple(parents)
+
+    def index(self, states: Sequence[bool]) -> int:
+        """
+        Position of a combination of parent states in the flat array.
+        """
+        if len(states) != self.n_parents:
+            raise ValueError(
+                f"Expected {self.n_parents} parent states, got {len(states)}"
+            )
+        index = 0
+        for state in states:
+            index = (index << 1) | bool(state)
+        return index
+
+    def __getitem__(self, states: Sequence[bool]) -> float:
+        return float(self.values[self.index(states)])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_array(self) -> np.ndarray:
+        return self.values.reshape((2,) * self.n_parents)
+
+    @classmethod
+    def from_weights(
+        cls,
+        weights: Sequence[float],
+        baseline: float = 0.0,
+        parents: Optional[Sequence[str]] = None,
+    ) -> "ConditionalTable":
+        """
+        Table where P(Lock-in | parents) is the baseline plus the weights of
+        the parent events that happened.
+        """
+        return cls(AdditiveCPT(weights, baseline).to_array(), parents)
+
+    @classmethod
+    def from_dict(
+        cls,
+        cpt: Dict[Tuple[bool, ...], float],
+        parents: Optional[Sequence[str]] = None,
+    ) -> "ConditionalTable":
+        """
+        Table from a mapping of tuples of parent states to P(Lock-in | parents),
+        raising if any combination of states is missing.
+        """
+        n_parents = len(next(iter(cpt)))
+        missing = [
+            states
+            for states in itertools.product([False, True], repeat=n_parents)
+            if states not in cpt
+        ]
+        if missing:
+            raise ValueError(
+                f"CPT is missing {len(missing)} entries, e.g. {missing[0]}"
+            )
+        if len(cpt) != 1 << n_parents:
+            raise ValueError("CPT keys must all be tuples of the same length")
+        return cls(cpt_to_array(cpt), parents)
+
+    @classmethod
+    def from_function(
+        cls, func: Callable[..., float], parents: Union[int, Sequence[str]]
+    ) -> "ConditionalTable":
+        """
+        Table from func(*states) evaluated on every combination of parent states.
+
+        Args:
+            func (callable): Takes one bool per parent and returns P(Lock-in)
+            parents (int or list): Number of parents, or their names
+        """
+        n_parents = parents if isinstance(parents, int) else len(parents)
+        values = [
+            func(*states)
+            for states in itertools.product([False, True], repeat=n_parents)
+        ]
+        return cls(values, None if isinstance(parents, int) else parents)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ConditionalTable":
+        """
+        Table from a CSV with one column per parent holding 0/1 or True/False,
+        in bit order, and the probability in the last column.
+        """
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            parents = header[:-1]
+            cpt = {}
+            for row in reader:
+                states = tuple(
+                    value.strip().lower() in ("1", "true") for value in row[:-1]
+                )
+                if states in cpt:
+                    raise ValueError(f"Duplicate row for parent states {states}")
+                cpt[states] = float(row[-1])
+        return cls.from_dict(cpt, parents)
+
+    def to_csv(self, path: str) -> None:
+        parents = self.parents or [f"parent_{i}" for i in range(self.n_parents)]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(parents) + ["p_lock_in"])
+            for states in itertools.product([0, 1], repeat=self.n_parents):
+                writer.writerow(list(states) + [repr(self[states])])
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary form: a small header with the parent names followed by
+        the raw little-endian float64 values.
+        """
+        names = json.dumps(self.parents).encode()
+        header = self._MAGIC + struct.pack("<BI", self.n_parents, len(names)) + names
+        return header + self.values.astype("<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ConditionalTable":
+        if data[:4] != cls._MAGIC:
+            raise ValueError("Not a serialised ConditionalTable")
+        n_parents, n_name_bytes = struct.unpack_from("<BI", data, 4)
+        start = 4 + struct.calcsize("<BI")
+        parents = json.loads(data[start : start + n_name_bytes])
+        values = np.frombuffer(data, dtype="<f8", offset=start + n_name_bytes)
+        if len(values) != 1 << n_parents:
+            raise ValueError("Serialised ConditionalTable is truncated")
+        return cls(values, parents)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "ConditionalTable":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class AdditiveCPT:
+    """
+    Weighted-sum CPT: P(Lock-in | parents) = baseline + sum of the weights of the
+    parent events that happened.
+
+    With independent parents P(Lock-in) is linear in the marginals, so it can be
+    evaluated in O(n_parents) per year without building the 2^n table.
+    """
+
+    def __init__(self, weights: Sequence[float], baseline: float = 0.0):
+        self.weights = np.asarray(weights, dtype=float)
+        self.baseline = float(baseline)
+        if self.weights.ndim != 1:
+            raise ValueError("weights must be a one-dimensional sequence")
+        # The largest and smallest table entries add up only the positive or
+        # only the negative weights
+        if not 0 <= self.baseline + self.weights.clip(min=0).sum() <= 1:
+            raise ValueError("baseline plus positive weights must stay within [0, 1]")
+        if not 0 <= self.baseline + self.weights.clip(max=0).sum() <= 1:
+            raise ValueError("baseline plus negative weights must stay within [0, 1]")
+
+    @property
+    def n_parents(self) -> int:
+        return len(self.weights)
+
+    def to_array(self) -> np.ndarray:
+        table = np.full((2,) * self.n_parents, self.baseline)
+        for i, weight in enumerate(self.weights):
+            shape = [1] * self.n_parents
+            shape[i] = 2
+            table = table + np.array([0.0, weight]).reshape(shape)
+        return table
+
+    def marginal(self, marginals: Sequence[np.ndarray]) -> np.ndarray:
+        stacked = np.stack(np.broadcast_arrays(*marginals))
+        return self.baseline + np.tensordot(self.weights, stacked, axes=1)
+
+
+class NoisyOrCPT:
+    """
+    Noisy-OR CPT: each parent event that happened independently causes lock-in
+    with probability equal to its weight, on top of a background leak.
+
+    P(Lock-in | parents) = 1 - (1 - leak) * prod over events of (1 - weight)
+    """
+
+    def __init__(self, weights: Sequence[float], leak: float = 0.0):
+        self.weights = np.asarray(weights, dtype=float)
+        self.leak = float(leak)
+        if self.weights.ndim != 1:
+            raise ValueError("weights must be a one-dimensional sequence")
+        if np.any((self.weights < 0) | (self.weights > 1)) or not 0 <= leak <= 1:
+            raise ValueError("weights and leak must be probabilities in [0, 1]")
+
+    @property
+    def n_parents(self) -> int:
+        return len(self.weights)
+
+    def to_array(self) -> np.ndarray:
+        p_no_lock_in = np.full((2,) * self.n_parents, 1 - self.leak)
+        for i, weight in enumerate(self.weights):
+            shape = [1] * self.n_parents
+            shape[i] = 2
+            p_no_lock_in = p_no_lock_in * np.array([1.0, 1 - weight]).reshape(shape)
+        return 1 - p_no_lock_in
+
+    def marginal(self, marginals: Sequence[np.ndarray]) -> np.ndarray:
+        stacked = np.stack(np.broadcast_arrays(*marginals))
+        weights = self.weights.reshape((-1,) + (1,) * (stacked.ndim - 1))
+        return 1 - (1 - self.leak) * np.prod(1 - weights * stacked, axis=0)
+
+
+CPTLike = Union[
+    Dict[Tuple[bool, ...], float], np.ndarray, ConditionalTable, AdditiveCPT, NoisyOrCPT
+]
+
+
+def batch_lock_in(
+    cpts: Union[np.ndarray, Sequence[CPTLike]],
+    marginals: np.ndarray,
+    memory_budget: int = 256 * 2**20,
+) -> np.ndarray:
+    """
+    P(Lock-in) for every pair of CPT and set of node marginals.
+
+    For each set and year the probability of every combination of parent
+    states is built once, then all CPTs are applied with one matrix product.
+    The (set, year) rows are processed in blocks so the joint weights stay
+    within memory_budget bytes.
+
+    Args:
+        cpts (numpy.ndarray or list): Stack of dense CPTs of shape
+            (n_cpt,) + (2,) * n_nodes, or a list of CPTs of any supported type
+        marginals (numpy.ndarray): Node probabilities of shape
+            (n_sets, n_nodes, n_years), nodes in the CPT axis order
+        memory_budget (int): Bytes allowed for each block of joint weights
+
+    Returns:
+        numpy.ndarray: P(Lock-in) of shape (n_cpt, n_sets, n_years)
+    """
+    if not isinstance(cpts, np.ndarray):
+        cpts = np.stack([to_dense(cpt) for cpt in cpts])
+    marginals = np.asarray(marginals, dtype=float)
+    n_sets, n_nodes, n_years = marginals.shape
+    if cpts.shape[1:] != (2,) * n_nodes:
+        raise ValueError(f"CPTs of shape {cpts.shape[1:]} do not match {n_nodes} nodes")
+
+    # Bit-packed tables, first parent as the most significant bit
+    tables = cpts.reshape(len(cpts), 1 << n_nodes)
+    rows = marginals.transpose(1, 0, 2).reshape(n_nodes, n_sets * n_years)
+
+    # Building the weights briefly holds two copies of the block
+    block = max(1, memory_budget // (2 * 8 << n_nodes))
+    result = np.empty((len(cpts), n_sets * n_years))
+    for start in range(0, rows.shape[1], block):
+        p = rows[:, start : start + block]
+        weights = np.ones((p.shape[1], 1))
+        # Add parents from the last, so each new one becomes the highest bit
+        for q in p[::-1, :, None]:
+            weights = np.stack([weights * (1 - q), weights * q], axis=1)
+            weights = weights.reshape(len(q), -1)
+        result[:, start : start + block] = tables @ weights.T
+
+    return result.reshape(len(cpts), n_sets, n_years)
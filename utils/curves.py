@@ -0,0 +1,126 @@
+# %%
+import abc
+import numpy as np
+from numpy.typing import ArrayLike
+from utils.logistic_fit import logistic
+
+
+def _to_log_odds(p: np.ndarray, eps: float = 1e-12) -> np.ndarray:
+    p = np.clip(p, eps, 1 - eps)
+    return np.log(p) - np.log1p(-p)
+
+
+def _from_log_odds(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+# %%
+class NodeCurve(abc.ABC):
+    """
+    Continuous cumulative probability F(year) that a node's event has
+    happened by a given year.
+
+    Subclasses implement _evaluate. Evaluated grids are cached per curve, so
+    repeated forecasts on the same grid only pay for the lookup.
+    """
+
+    max_cached_grids = 16
+
+    def __init__(self):
+        self._cache = {}
+
+    @abc.abstractmethod
+    def _evaluate(self, years: np.ndarray) -> np.ndarray:
+        """
+        Cumulative probability at each year, before clipping to [0, 1].
+        """
+
+    def __call__(self, years: ArrayLike) -> np.ndarray:
+        years = np.asarray(years, dtype=float)
+        key = (years.shape, years.tobytes())
+        if key not in self._cache:
+            if len(self._cache) >= self.max_cached_grids:
+                self._cache.pop(next(iter(self._cache)))
+            values = np.clip(self._evaluate(years), 0.0, 1.0)
+            values.flags.writeable = False
+            self._cache[key] = values
+        return self._cache[key]
+
+    def hazard(self, years: ArrayLike, step: float = 0.5) -> np.ndarray:
+        """
+        Instantaneous hazard rate F'(t) / (1 - F(t)) per year.
+        """
+        years = np.asarray(years, dtype=float)
+        log_survival = [
+            np.log1p(-np.minimum(self._evaluate(years + d), 1 - 1e-12))
+            for d in (-step, step)
+        ]
+        return np.maximum((log_survival[0] - log_survival[1]) / (2 * step), 0.0)
+
+
+class LogisticCurve(NodeCurve):
+    """
+    F(year) = L / (1 + exp(-k * (year - x0))), e.g. from fit_logistic.
+    """
+
+    def __init__(self, L: float, k: float, x0: float):
+        super().__init__()
+        self.L, self.k, self.x0 = float(L), float(k), float(x0)
+
+    def _evaluate(self, years: np.ndarray) -> np.ndarray:
+        return logistic(years, self.L, self.k, self.x0)
+
+
+class LogOddsLinearCurve(NodeCurve):
+    """
+    Piecewise-linear interpolation in log-odds between anchor points, with the
+    first and last segments extended linearly on either side. A single anchor
+    gives a constant curve.
+    """
+
+    def __init__(self, years: ArrayLike, probabilities: ArrayLike):
+        super().__init__()
+        order = np.argsort(years)
+        self.years = np.asarray(years, dtype=float)[order]
+        self.log_odds = _to_log_odds(np.asarray(probabilities, dtype=float)[order])
+
+        # Precompute per-segment slopes, reusing the end slopes outside the range
+        if len(self.years) > 1:
+            self.slopes = np.diff(self.log_odds) / np.diff(self.years)
+        else:
+            self.slopes = np.zeros(1)
+
+    def _evaluate(self, years: np.ndarray) -> np.ndarray:
+        segment = np.clip(
+            np.searchsorted(self.years, years, side="right") - 1,
+            0,
+            len(self.slopes) - 1,
+        )
+        x = self.log_odds[segment] + self.slopes[segment] * (
+            years - self.years[segment]
+        )
+        return _from_log_odds(x)
+
+
+class PchipCurve(NodeCurve):
+    """
+    Monotone cubic (PCHIP) interpolation in log-odds between anchor points.
+    The spline coefficients are built once; outside the anchor range the curve
+    is held at its end values.
+    """
+
+    def __init__(self, years: ArrayLike, probabilities: ArrayLike):
+        super().__init__()
+        from scipy.interpolate import PchipInterpolator
+
+        order = np.argsort(years)
+        self.years = np.asarray(years, dtype=float)[order]
+        self.spline = PchipInterpolator(
+            self.years,
+            _to_log_odds(np.asarray(probabilities, dtype=float)[order]),
+            extrapolate=False,
+        )
+
+    def _evaluate(self, years: np.ndarray) -> np.ndarray:
+        clamped = np.clip(years, self.years[0], self.years[-1])
+        return _from_log_odds(self.spline(clamped))
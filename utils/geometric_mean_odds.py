@@ -1,12 +1,15 @@
 # %%
 import math
+import numpy as np
+from typing import Optional
+from numpy.typing import ArrayLike
 
 # %%
 
 
 def get_odds(p):
     if p == 1:
-        return p
+        return math.inf
     return p / (1 - p)
 
 
@@ -18,4 +21,49 @@ def get_geometric_mean(values):
 
 
 def odds_to_probability(odds):
+    if odds == math.inf:
+        return 1.0
     return odds / (1 + odds)
+
+
+def geometric_mean_odds(
+    probabilities: ArrayLike,
+    weights: Optional[ArrayLike] = None,
+    axis: int = -1,
+    eps: float = 1e-9,
+) -> np.ndarray:
+    """
+    Aggregate probabilities with the (weighted) geometric mean of odds.
+
+    Works in log-odds space, so it does not overflow or underflow however many
+    sources there are.
+
+    Args:
+        probabilities (array-like): Forecasts, e.g. shape (n_rows, n_sources)
+        weights (array-like, optional): Weight of each source, either one per
+            source along axis, shape (n_sources,), or an array broadcast
+            against probabilities. Defaults to equal weights
+        axis (int): Axis holding the sources
+        eps (float): Probabilities are clipped to [eps, 1 - eps] so that 0 and 1
+            do not dominate the mean. NaNs are skipped
+
+    Returns:
+        numpy.ndarray: Aggregated probabilities with the source axis removed
+    """
+    p = np.clip(np.asarray(probabilities, dtype=float), eps, 1 - eps)
+    log_odds = np.log(p) - np.log1p(-p)
+
+    present = ~np.isnan(log_odds)
+    if weights is None:
+        w = np.ones_like(log_odds)
+    else:
+        w = np.asarray(weights, dtype=float)
+        if w.ndim == 1 and log_odds.ndim > 1:
+            # One weight per source, laid along the source axis
+            axes = [i for i in range(log_odds.ndim) if i != axis % log_odds.ndim]
+            w = np.expand_dims(w, axes)
+    w = np.where(present, w, 0.0)
+
+    weighted_sum = np.sum(w * np.where(present, log_odds, 0.0), axis=axis)
+    mean_log_odds = weighted_sum / np.sum(w, axis=axis)
+    return 1 / (1 + np.exp(-mean_log_odds))
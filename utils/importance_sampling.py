@@ -0,0 +1,162 @@
+# %%
+import itertools
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence, Union
+from numpy.typing import ArrayLike
+from utils.cpt import AdditiveCPT, CPTLike, NoisyOrCPT, to_dense
+
+
+def cpt_function(
+    cpt: Union[CPTLike, Callable[[np.ndarray], np.ndarray]],
+) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Function from parent states, a bool array of shape (..., n_parents), to
+    P(Lock-in | parents). Additive and noisy-OR CPTs are evaluated directly;
+    dense tables are looked up by bit-packed index, first parent as the most
+    significant bit. Callables are returned unchanged.
+    """
+    if isinstance(cpt, AdditiveCPT):
+        return lambda states: cpt.baseline + states @ cpt.weights
+    if isinstance(cpt, NoisyOrCPT):
+        return lambda states: 1 - (1 - cpt.leak) * np.prod(
+            1 - cpt.weights * states, axis=-1
+        )
+    if callable(cpt) and not hasattr(cpt, "to_array"):
+        return cpt
+
+    table = to_dense(cpt)
+    flat = table.ravel()
+    bits = 1 << np.arange(table.ndim)[::-1]
+    return lambda states: flat[states.astype(np.int64) @ bits]
+
+
+# %%
+def importance_sample_lock_in(
+    cpt: Union[CPTLike, Callable[[np.ndarray], np.ndarray]],
+    nodes: Dict[str, ArrayLike],
+    n_samples: int = 10_000,
+    stratify: Optional[Sequence[str]] = None,
+    rare_threshold: float = 0.01,
+    min_proposal: float = 0.1,
+    control_variates: bool = True,
+    max_strata: int = 64,
+    min_stratum_fraction: float = 0.05,
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Estimate P(Lock-in) by sampling which parent events happen, with variance
+    reduction for rare parents such as stable totalitarianism.
+
+    - Stratification: every combination of states of the stratified parents
+      is its own stratum with an exact probability and a guaranteed share of
+      the samples, so states with a 1e-4 chance are still sampled thousands
+      of times.
+    - Importance sampling: other rare parents are drawn with probability at
+      least min_proposal and the samples reweighted by the likelihood ratio.
+    - Control variates: the weighted parent indicators, whose expectations are
+      the known marginals, are regressed out within each stratum. This
+      removes all the variance a linear (additive) CPT would have.
+
+    Within a stratum the same uniform draws are reused across years.
+
+    Args:
+        cpt: CPT accepted by contract_cpt, or a function of parent states as
+            in cpt_function, in the same parent order as nodes
+        nodes (dict): Ordered mapping of node names to probabilities, scalars
+            or shape (n_years,)
+        n_samples (int): Total number of sampled worlds across strata
+        stratify (list, optional): Names of parents to stratify on. Defaults
+            to parents whose probability falls below rare_threshold in any
+            year, as many as max_strata allows
+        rare_threshold (float): Probability below which a parent counts as rare
+        min_proposal (float): Proposal probability for rare, unstratified parents
+        control_variates (bool): Regress out the parent indicators
+        max_strata (int): Maximum number of strata
+        min_stratum_fraction (float): Smallest share of the samples given to
+            each stratum
+        seed (int, optional): Seed for the random generator
+
+    Returns:
+        dict: "estimate" and "std_error" of P(Lock-in) and the effective sample
+        size "ess" for each year; the "strata" states of the "stratified"
+        parents with their "stratum_probability" and the conditional
+        "stratum_estimate" P(Lock-in | stratum) with its "stratum_std_error",
+        each of shape (n_strata, n_years)
+    """
+    names = list(nodes)
+    p = np.stack([np.atleast_1d(np.asarray(v, dtype=float)) for v in nodes.values()])
+    n_parents, n_years = p.shape
+    rare = p.min(axis=1) < rare_threshold
+
+    if stratify is None:
+        max_bits = int(np.log2(max_strata))
+        stratify = [name for name, r in zip(names, rare) if r][:max_bits]
+    stratified = [names.index(name) for name in stratify]
+    free = [i for i in range(n_parents) if i not in stratified]
+    strata = np.array(
+        list(itertools.product([False, True], repeat=len(stratified))), dtype=bool
+    ).reshape(1 << len(stratified), len(stratified))
+    stratum_probability = np.prod(
+        np.where(strata[:, None, :], p[stratified].T, 1 - p[stratified].T), axis=-1
+    )
+
+    # Every stratum gets at least min_stratum_fraction of the samples, the
+    # rest follow the stratum's largest probability over the years
+    floor = min(min_stratum_fraction, 1 / len(strata))
+    share = stratum_probability.max(axis=1)
+    share = floor + (1 - floor * len(strata)) * share / share.sum()
+    sizes = np.maximum((share * n_samples).astype(int), 2)
+
+    # Tilted proposal for rare parents that are not stratified
+    q = p.copy()
+    for i in free:
+        if rare[i]:
+            q[i] = np.maximum(p[i], min_proposal)
+    p_free, q_free = p[free].T, q[free].T
+    f = cpt_function(cpt)
+
+    rng = np.random.default_rng(seed)
+    stratum_estimate = np.empty((len(strata), n_years))
+    stratum_variance = np.empty((len(strata), n_years))
+    ess = np.zeros(n_years)
+    for k, (stratum, size) in enumerate(zip(strata, sizes)):
+        states = rng.random((size, 1, n_parents)) < q.T
+        states[..., stratified] = stratum
+
+        # Likelihood ratio of the free parents
+        x = states[..., free]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_ratio = np.where(
+                x,
+                np.log(p_free) - np.log(q_free),
+                np.log1p(-p_free) - np.log1p(-q_free),
+            )
+        weights = np.exp(np.nan_to_num(log_ratio, nan=0.0).sum(axis=-1))
+        y = weights * f(states)
+
+        if control_variates and free:
+            # Weighted indicators and weights have known means p and 1
+            controls = np.concatenate(
+                [weights[..., None] * x - p_free, weights[..., None] - 1], axis=-1
+            )
+            centred = controls - controls.mean(axis=0)
+            covariance = np.einsum("nyi,nyj->yij", centred, centred)
+            cross = np.einsum("nyi,ny->yi", centred, y - y.mean(axis=0))
+            beta = np.einsum("yij,yj->yi", np.linalg.pinv(covariance), cross)
+            y = y - np.einsum("nyi,yi->ny", controls, beta)
+
+        stratum_estimate[k] = y.mean(axis=0)
+        stratum_variance[k] = y.var(axis=0, ddof=1) / size
+        ess += weights.sum(axis=0) ** 2 / (weights**2).sum(axis=0)
+
+    return {
+        "estimate": (stratum_probability * stratum_estimate).sum(axis=0),
+        "std_error": np.sqrt((stratum_probability**2 * stratum_variance).sum(axis=0)),
+        "ess": ess,
+        "n_samples": int(sizes.sum()),
+        "stratified": [names[i] for i in stratified],
+        "strata": strata,
+        "stratum_probability": stratum_probability,
+        "stratum_estimate": stratum_estimate,
+        "stratum_std_error": np.sqrt(stratum_variance),
+    }
@@ -1,53 +1,152 @@
 # %%
+import os
+import sys
 import numpy as np
+from numpy.typing import ArrayLike
 
+SPACES = ("probability", "odds", "log_odds")
 
-def interpolate(x, x_values, y_values):
-    return np.interp(x, x_values, y_values)
 
+def _to_space(p: np.ndarray, space: str, eps: float) -> np.ndarray:
+    if space == "probability":
+        return p
+    p = np.clip(p, eps, 1 - eps)
+    if space == "odds":
+        return p / (1 - p)
+    return np.log(p) - np.log1p(-p)
 
-# When extrapolating below, use the leftmost data points rather than the
-# rightmost?
-def extrapolate(x, x_values, y_values):
-    slope = (y_values[-1] - y_values[-2]) / (x_values[-1] - x_values[-2])
-    return y_values[-1] + slope * (x - x_values[-1])
 
+def _from_space(x: np.ndarray, space: str) -> np.ndarray:
+    if space == "probability":
+        return x
+    if space == "odds":
+        x = np.maximum(x, 0.0)
+        return x / (1 + x)
+    return 1 / (1 + np.exp(-x))
 
-# %%
-# Set years
-year_a = 2030
-year_b = 2055
-year_c = 2080
-year_d = 2105
-year_e = 2130
 
 # %%
-# World War III
-x_values = [2050, 2151]
-y_values = [30, 59]  # Percentages
+def regrid(
+    years: ArrayLike,
+    anchor_years: ArrayLike,
+    anchor_probabilities: ArrayLike,
+    space: str = "log_odds",
+    monotone: bool = True,
+    default_slope: float = 0.0,
+    eps: float = 1e-9,
+) -> np.ndarray:
+    """
+    Interpolate and extrapolate cumulative probabilities from anchor points
+    onto a grid of years, for many series at once.
 
-# Extrapolation (before available range)
-print(f"Interpolated value for {year_a}: {extrapolate(year_a, x_values, y_values)}%")
+    Each series is linear in the chosen space between its anchors and extends
+    the first and last segments on either side of its range. A series with a
+    single anchor follows default_slope (per year, in the chosen space) through
+    it. Results are clamped to [0, 1].
 
-# Interpolation
-# print(f"Interpolated value for {year_a}: {interpolate(year_a, x_values, y_values)}%")
-print(f"Interpolated value for {year_b}: {interpolate(year_b, x_values, y_values)}%")
-print(f"Interpolated value for {year_c}: {interpolate(year_c, x_values, y_values)}%")
+    Args:
+        years (array-like): Target years, shape (n_years,)
+        anchor_years (array-like): Anchor years, shape (n_anchors,) shared by
+            every series or (n_series, n_anchors). NaN marks a missing anchor,
+            so series can have different numbers of anchors
+        anchor_probabilities (array-like): Probabilities at the anchors, shape
+            (n_anchors,) or (n_series, n_anchors)
+        space (str): "probability", "odds" or "log_odds"
+        monotone (bool): Make each series non-decreasing in year, as
+            cumulative probabilities must be, by taking the running maximum of
+            its anchors
+        default_slope (float): Slope for single-anchor series
+        eps (float): Clipping for odds and log-odds transforms
 
-# Extrapolation
-print(f"Extrapolated value at {year_d}: {extrapolate(year_d, x_values, y_values)}%")
-print(f"Extrapolated value at {year_e}: {extrapolate(year_e, x_values, y_values)}%")
+    Returns:
+        numpy.ndarray: Shape (n_years,) for a single series, otherwise
+        (n_series, n_years)
+    """
+    if space not in SPACES:
+        raise ValueError(f"space must be one of {SPACES}, not '{space}'")
+    years = np.asarray(years, dtype=float)
+    anchor_years = np.asarray(anchor_years, dtype=float)
+    anchor_probabilities = np.asarray(anchor_probabilities, dtype=float)
+    single = anchor_years.ndim == 1 and anchor_probabilities.ndim == 1
+    anchor_years, anchor_probabilities = np.broadcast_arrays(
+        np.atleast_2d(anchor_years), np.atleast_2d(anchor_probabilities)
+    )
 
-# %%
-# AI Impacts
-x_values = [2059]
-y_values = [50]  # Percentages
+    # Sort each series by year, with missing anchors last
+    missing = np.isnan(anchor_years) | np.isnan(anchor_probabilities)
+    sort_years = np.where(missing, np.inf, anchor_years)
+    order = np.argsort(sort_years, axis=1, kind="stable")
+    x = np.take_along_axis(sort_years, order, axis=1)
+    p = np.take_along_axis(np.where(missing, np.nan, anchor_probabilities), order, 1)
+    n_valid = (~missing).sum(axis=1)
+    if np.any(n_valid == 0):
+        raise ValueError("Every series needs at least one anchor")
+
+    if monotone:
+        p = np.fmax.accumulate(p, axis=1)
+    y = _to_space(p, space, eps)
+
+    # Segment to the left of each target year, held to the first and last
+    # segments outside the anchor range
+    segment = (x[:, None, :] <= years[None, :, None]).sum(axis=-1) - 1
+    segment = np.clip(segment, 0, np.maximum(n_valid - 2, 0)[:, None])
+    rows = np.arange(len(x))[:, None]
+
+    x0, y0 = x[rows, segment], y[rows, segment]
+    has_segment = (n_valid > 1)[:, None]
+    next_segment = np.minimum(segment + 1, x.shape[1] - 1)
+    x1, y1 = x[rows, next_segment], y[rows, next_segment]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(has_segment, (y1 - y0) / (x1 - x0), default_slope)
+    values = _from_space(y0 + slope * (years - x0), space)
+
+    values = np.clip(values, 0.0, 1.0)
+    if monotone and np.all(np.diff(years) >= 0):
+        values = np.maximum.accumulate(values, axis=1)
+    return values[0] if single else values
 
-# Extrapolation (before available range)
-print(f"Interpolated value for {year_a}: {interpolate(year_a, x_values, y_values)}%")
-print(f"Interpolated value for {year_b}: {interpolate(year_b, x_values, y_values)}%")
-print(f"Interpolated value for {year_c}: {interpolate(year_c, x_values, y_values)}%")
-print(f"Interpolated value for {year_d}: {interpolate(year_d, x_values, y_values)}%")
-print(f"Interpolated value for {year_e}: {interpolate(year_e, x_values, y_values)}%")
 
 # %%
+def main():
+    years = [2030, 2055, 2080, 2105, 2130]
+
+    # World War III: two anchors, extrapolated on both sides along the line
+    # through them in probability space
+    wwiii = regrid(years, [2050, 2151], [0.30, 0.59], space="probability")
+    for year, p in zip(years, wwiii):
+        print(f"World War III by {year}: {p:.2%}")
+
+    # AI Impacts: the survey's median years for 10%, 50% and 90% chances of
+    # HLMI, interpolated in log-odds
+    from utils.ai_impacts_medians import SURVEY_YEAR, get_survey_quantiles
+
+    medians = get_survey_quantiles()
+    ai_impacts = regrid(
+        years,
+        [SURVEY_YEAR + medians[column][0.5] for column in medians],
+        [0.1, 0.5, 0.9],
+    )
+    for year, p in zip(years, ai_impacts):
+        print(f"AI Impacts HLMI by {year}: {p:.2%}")
+
+    # Many series in one call, e.g. every AGI source on a yearly grid, with
+    # shorter anchor lists padded with NaN
+    from forecast_inputs import AGI_SOURCES
+
+    n_anchors = max(len(source["years"]) for source in AGI_SOURCES.values())
+    anchors = [
+        [
+            list(source[key]) + [np.nan] * (n_anchors - len(source[key]))
+            for source in AGI_SOURCES.values()
+        ]
+        for key in ("years", "probabilities")
+    ]
+    yearly = regrid(np.arange(2025, 2201), *anchors, space="probability")
+    print(f"Regridded {yearly.shape[0]} AGI sources onto {yearly.shape[1]} years")
+
+
+if __name__ == "__main__":
+    # Let `python utils/interpolate_extrapolate.py` import the repository
+    # modules the demo uses
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    main()
@@ -0,0 +1,143 @@
+# %%
+import numpy as np
+from typing import Dict, Optional
+from numpy.typing import ArrayLike
+
+
+def logistic(years: ArrayLike, L: ArrayLike, k: ArrayLike, x0: ArrayLike) -> np.ndarray:
+    """
+    Evaluate L / (1 + exp(-k * (year - x0))) for one or many curves.
+
+    Args:
+        years (array-like): Years to evaluate, shape (n_years,)
+        L, k, x0 (array-like): Curve parameters, scalars or shape (n_curves,)
+
+    Returns:
+        numpy.ndarray: Shape (n_years,) or (n_curves, n_years)
+    """
+    L, k, x0 = (np.asarray(a, dtype=float)[..., None] for a in (L, k, x0))
+    return L / (1 + np.exp(-k * (np.asarray(years, dtype=float) - x0)))
+
+
+def fit_logistic(
+    years: ArrayLike,
+    probabilities: ArrayLike,
+    k_prior: float = 0.02,
+    x0_prior: Optional[ArrayLike] = None,
+    prior_weight: float = 1e-2,
+    n_iter: int = 50,
+) -> Dict[str, np.ndarray]:
+    """
+    Fit (L, k, x0) of a logistic curve to (year, probability) anchor points,
+    for many curves at once.
+
+    Residuals are taken in log-probability, so small probabilities such as
+    stable totalitarianism are fitted relative to their size. Curves with
+    fewer than three anchors are underdetermined; a weak prior towards
+    L = 1.2 * max anchor, k = k_prior and x0 = x0_prior (default: mean anchor
+    year) picks the fit closest to those values. All curves are solved
+    together by Levenberg-Marquardt with analytic Jacobians.
+
+    Args:
+        years (array-like): Anchor years, shape (n_anchors,) or
+            (n_curves, n_anchors). NaN marks a missing anchor
+        probabilities (array-like): Anchor probabilities, same shape as years
+        k_prior (float): Growth rate the prior pulls towards
+        x0_prior (array-like, optional): Midpoint year the prior pulls towards
+        prior_weight (float): Strength of the prior relative to the anchors
+        n_iter (int): Number of Levenberg-Marquardt iterations
+
+    Returns:
+        dict: "L", "k" and "x0" of shape (n_curves,), or scalars for a single
+        curve, and the root-mean-square log "residual" at the anchors
+    """
+    years = np.asarray(years, dtype=float)
+    probabilities = np.asarray(probabilities, dtype=float)
+    single = years.ndim == 1
+    years, probabilities = np.atleast_2d(years, probabilities)
+
+    present = ~(np.isnan(years) | np.isnan(probabilities))
+    t = np.where(present, years, 0.0)
+    log_target = np.log(np.where(present, probabilities, 1.0))
+    n_anchors = present.sum(axis=1)
+
+    # Unconstrained parameters: L = sigmoid(a), k = exp(b), x0 = c
+    L_start = np.clip(1.2 * np.nanmax(probabilities, axis=1), 1e-12, 0.99)
+    prior = np.stack(
+        [
+            np.log(L_start / (1 - L_start)),
+            np.full(len(years), np.log(k_prior)),
+            (
+                np.sum(t, axis=1) / n_anchors
+                if x0_prior is None
+                else np.broadcast_to(np.asarray(x0_prior, float), len(years))
+            ),
+        ],
+        axis=1,
+    )
+    # Scale the midpoint so a year counts like a unit of log growth rate
+    prior_scale = np.array([1.0, 1.0, 100.0])
+    theta = prior.copy()
+    damping = np.full(len(years), 1e-3)
+
+    def residuals_and_jacobian(theta):
+        a, b, c = theta[:, :1], theta[:, 1:2], theta[:, 2:]
+        L, k = 1 / (1 + np.exp(-a)), np.exp(b)
+        z = -k * (t - c)
+        # log p = log L - softplus(z)
+        log_p = np.log(L) - np.logaddexp(0, z)
+        s = np.exp(z - np.logaddexp(0, z))  # d softplus(z) / dz
+
+        r_fit = np.where(present, log_p - log_target, 0.0)
+        jacobian_fit = (
+            np.stack(
+                [
+                    np.broadcast_to(1 - L, t.shape),
+                    s * k * (t - c),
+                    -s * k,
+                ],
+                axis=-1,
+            )
+            * present[..., None]
+        )
+
+        r_prior = prior_weight * (theta - prior) / prior_scale
+        jacobian_prior = np.broadcast_to(
+            np.diag(prior_weight / prior_scale), (len(theta), 3, 3)
+        )
+
+        r = np.concatenate([r_fit, r_prior], axis=1)
+        jacobian = np.concatenate([jacobian_fit, jacobian_prior], axis=1)
+        return r, jacobian
+
+    r, jacobian = residuals_and_jacobian(theta)
+    cost = np.sum(r**2, axis=1)
+    for _ in range(n_iter):
+        jtj = np.einsum("nmi,nmj->nij", jacobian, jacobian)
+        jtr = np.einsum("nmi,nm->ni", jacobian, r)
+        diagonal = np.einsum("nii->ni", jtj)
+        step = np.linalg.solve(
+            jtj + damping[:, None, None] * np.eye(3) * diagonal[:, None, :],
+            -jtr[..., None],
+        )[..., 0]
+
+        new_theta = theta + step
+        new_r, new_jacobian = residuals_and_jacobian(new_theta)
+        new_cost = np.sum(new_r**2, axis=1)
+
+        # Accept improving steps and relax damping, otherwise damp harder
+        improved = new_cost < cost
+        theta = np.where(improved[:, None], new_theta, theta)
+        r = np.where(improved[:, None], new_r, r)
+        jacobian = np.where(improved[:, None, None], new_jacobian, jacobian)
+        cost = np.where(improved, new_cost, cost)
+        damping = np.where(improved, damping / 3, damping * 3)
+
+    L = 1 / (1 + np.exp(-theta[:, 0]))
+    k = np.exp(theta[:, 1])
+    x0 = theta[:, 2]
+    residual = np.sqrt(np.sum(r[:, : t.shape[1]] ** 2, axis=1) / n_anchors)
+
+    if single:
+        return {"L": L[0], "k": k[0], "x0": x0[0], "residual": residual[0]}
+    return {"L": L, "k": k, "x0": x0, "residual": residual}
@@ -1,6 +1,37 @@
 # %%
-import pandas as pd
 import numpy as np
+from numpy.typing import ArrayLike
+
+
+def logistic_curves(
+    years: ArrayLike, target_year: ArrayLike, target_prob: ArrayLike, k: ArrayLike
+) -> np.ndarray:
+    """
+    Evaluate logistic curves for many scenarios over a grid of years at once.
+
+    Each scenario's curve has its cap at 1.2 * target_prob and its midpoint 100
+    years before target_year, as in get_logistic_interpolation.
+
+    Args:
+        years (array-like): Years to evaluate, shape (n_years,)
+        target_year (array-like): Year with a known probability per scenario
+        target_prob (array-like): Known probability for target_year per scenario
+        k (array-like): Growth rate per scenario
+
+    Returns:
+        numpy.ndarray: Probabilities of shape (n_scenarios, n_years), or
+        (n_years,) when every parameter is a scalar
+    """
+    years = np.asarray(years, dtype=float)
+    target_year, target_prob, k = (
+        np.asarray(a, dtype=float)[..., None] for a in (target_year, target_prob, k)
+    )
+
+    # Logistic function parameters
+    L = target_prob * 1.2  # maximum probability cap (slightly above target_prob)
+    x0 = target_year - 100  # midpoint year
+
+    return L / (1 + np.exp(-k * (years - x0)))
 
 
 def get_logistic_interpolation(years, target_year, target_prob, k):
@@ -16,25 +47,16 @@ def get_logistic_interpolation(years, target_year, target_prob, k):
     Returns:
         pandas.DataFrame: Years and their corresponding probabilities
     """
-    # Logistic function parameters
-    L = target_prob * 1.2  # maximum probability cap (slightly above target_prob)
-    x0 = target_year - 100  # midpoint year
-    base_year = 2000  # reference year for calculation
+    import pandas as pd
 
-    # Calculate probabilities using logistic function
-    probabilities = []
-    for year in years:
-        t = year - base_year
-        t0 = x0 - base_year
-        p = L / (1 + np.exp(-k * (t - t0)))
-        probabilities.append(p)
+    probabilities = logistic_curves(years, target_year, target_prob, k)
 
     # Create DataFrame with results
     results = pd.DataFrame(
         {
             "year": years,
             "probability": probabilities,
-            "probability_percentage": [p * 100 for p in probabilities],
+            "probability_percentage": probabilities * 100,
         }
     )
 
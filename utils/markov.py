@@ -0,0 +1,130 @@
+# %%
+import numpy as np
+from typing import Callable, Dict, Union
+from numpy.typing import ArrayLike
+from utils.cpt import CPTLike, to_dense
+
+
+# %%
+def node_hazards(cumulative: ArrayLike) -> np.ndarray:
+    """
+    Yearly probability that an event happens, given it has not happened yet,
+    from its cumulative probabilities at the start of each year.
+
+    Args:
+        cumulative (array-like): P(event by year) on consecutive years, shape
+            (n_nodes, n_years + 1) with optional trailing batch dimensions
+
+    Returns:
+        numpy.ndarray: Hazards of shape (n_nodes, n_years, ...). Years where the
+        cumulative curve falls get a hazard of zero
+    """
+    cumulative = np.asarray(cumulative, dtype=float)
+    survival = 1 - cumulative[:, :-1]
+    increase = np.maximum(np.diff(cumulative, axis=1), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hazards = np.where(survival > 0, increase / survival, 1.0)
+    return np.clip(hazards, 0.0, 1.0)
+
+
+def lock_in_hazards(cpt: CPTLike, horizon: float) -> np.ndarray:
+    """
+    Yearly lock-in hazard for each combination of parent states, reading
+    P(Lock-in | parents) as the chance of lock-in if that world persisted for
+    horizon years: 1 - (1 - P) ** (1 / horizon).
+
+    Returns:
+        numpy.ndarray: Flat array of 2 ** n_parents hazards in bit-packed order,
+        first parent as the most significant bit
+    """
+    table = to_dense(cpt)
+    table = np.clip(np.asarray(table, dtype=float).ravel(), 0.0, 1.0)
+    return 1 - (1 - table) ** (1 / horizon)
+
+
+# %%
+def simulate_lock_in(
+    cpt: CPTLike,
+    nodes: Dict[str, Union[Callable[[np.ndarray], np.ndarray], ArrayLike]],
+    start_year: int,
+    end_year: int,
+    horizon: float = 100.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Year-by-year Markov chain over which parent events have happened, with
+    lock-in as an absorbing state.
+
+    The chain holds the probability of every one of the 2 ** n_parents world
+    states that has not locked in, as a flat bit-packed array. Each year
+    locked-in mass is absorbed at the lock_in_hazards rate of its state, then
+    every event that has not happened yet happens at its node hazard, one
+    parent at a time through a reshape that exposes that parent's bit.
+    Parent events stay happened, and lock-in is never undone, so the
+    cumulative lock-in curve is non-decreasing.
+
+    Args:
+        cpt: CPT in the same parent order as nodes
+        nodes (dict): Ordered mapping of node names to NodeCurves (or any
+            callable of years), or to P(event by year) on every year from
+            start_year to end_year inclusive, optionally with trailing batch
+            dimensions
+        start_year (int): First year of the chain; events start at their
+            probability for this year and lock-in at zero
+        end_year (int): Last year of the chain
+        horizon (float): Years over which a CPT entry's probability applies
+
+    Returns:
+        dict: "years" from start_year to end_year, "p_lock_in" P(lock-in by
+        year), "marginals" P(event by year) for each node under the chain, and
+        "state" the final distribution over non-locked-in world states
+    """
+    years = np.arange(start_year, end_year + 1)
+    cumulative = np.stack(
+        [
+            node(years) if callable(node) else np.asarray(node, dtype=float)
+            for node in nodes.values()
+        ]
+    )
+    if cumulative.shape[1] != len(years):
+        raise ValueError(
+            f"Node arrays need one value per year from {start_year} to {end_year}"
+        )
+    n_parents = len(cumulative)
+    batch_shape = cumulative.shape[2:]
+    hazards = node_hazards(cumulative)
+    lock_in = lock_in_hazards(cpt, horizon)
+    if len(lock_in) != 1 << n_parents:
+        raise ValueError(
+            f"CPT has {int(np.log2(len(lock_in)))} parents but {n_parents} nodes"
+        )
+    lock_in = lock_in.reshape((-1,) + (1,) * len(batch_shape))
+
+    # Independent starting states from each event's probability at start_year
+    state = np.ones((1,) + batch_shape)
+    for p in cumulative[::-1, 0]:
+        state = np.concatenate([state * (1 - p), state * p])
+
+    p_lock_in = np.zeros((len(years),) + batch_shape)
+    marginals = np.empty(cumulative.shape)
+    marginals[:, 0] = cumulative[:, 0]
+    absorbed = np.zeros(batch_shape)
+    for t in range(len(years) - 1):
+        absorbed = absorbed + (state * lock_in).sum(axis=0)
+        state = state * (1 - lock_in)
+
+        for i in range(n_parents):
+            bits = state.reshape((1 << i, 2, -1) + batch_shape)
+            happened = bits[:, 0] * hazards[i, t]
+            bits[:, 0] -= happened
+            bits[:, 1] += happened
+
+        p_lock_in[t + 1] = absorbed
+        # Events keep their marginal whether or not lock-in has happened
+        marginals[:, t + 1] = 1 - (1 - marginals[:, t]) * (1 - hazards[:, t])
+
+    return {
+        "years": years,
+        "p_lock_in": p_lock_in,
+        "marginals": marginals,
+        "state": state,
+    }
@@ -0,0 +1,162 @@
+# %%
+import numpy as np
+from typing import Dict, Optional, Sequence, Union
+from numpy.typing import ArrayLike
+from utils.cpt import contract_cpt
+
+
+# %%
+class BetaNode:
+    """
+    Beta-distributed node probability with the given mean for each year.
+
+    One uniform draw is shared across years and mapped through each year's
+    Beta quantile function, so each sampled curve stays at the same quantile
+    in every year, as with LogitNormalNode. The quantile functions are
+    tabulated once on a grid of n_grid points and interpolated linearly.
+
+    Args:
+        mean (array-like): Mean probability for each forecast year
+        concentration (float): alpha + beta; larger values give tighter spread
+        n_grid (int): Number of points in each tabulated quantile function
+    """
+
+    def __init__(
+        self, mean: ArrayLike, concentration: float = 20.0, n_grid: int = 1 << 12
+    ):
+        from scipy.special import betaincinv
+
+        mean = np.asarray(mean, dtype=float)
+        self.alpha = mean * concentration
+        self.beta = (1 - mean) * concentration
+
+        # Quantiles of shape (n_grid + 1, n_years), one row per grid level
+        levels = np.linspace(0.0, 1.0, n_grid + 1)[:, None]
+        self._quantiles = betaincinv(self.alpha, self.beta, levels)
+
+    def sample(self, rng: np.random.Generator, n_samples: int) -> np.ndarray:
+        position = rng.random(n_samples) * (len(self._quantiles) - 1)
+        lower = np.minimum(position.astype(np.int64), len(self._quantiles) - 2)
+        fraction = (position - lower)[:, None]
+        below, above = self._quantiles[lower], self._quantiles[lower + 1]
+        return below + fraction * (above - below)
+
+
+class LogitNormalNode:
+    """
+    Logit-normal node probability centred on the given median for each year.
+
+    One normal draw is shared across years, so each sampled curve keeps the
+    shape of the median curve.
+
+    Args:
+        median (array-like): Median probability for each forecast year
+        sigma (float): Standard deviation in log-odds space
+    """
+
+    def __init__(self, median: ArrayLike, sigma: float = 0.5):
+        median = np.clip(np.asarray(median, dtype=float), 1e-12, 1 - 1e-12)
+        self.log_odds = np.log(median / (1 - median))
+        self.sigma = sigma
+
+    def sample(self, rng: np.random.Generator, n_samples: int) -> np.ndarray:
+        z = rng.standard_normal((n_samples, 1))
+        return 1 / (1 + np.exp(-(self.log_odds + self.sigma * z)))
+
+
+class EmpiricalNode:
+    """
+    Node probability drawn from a set of source forecasts, e.g. the rows that
+    AGI_averages.py aggregates.
+
+    Args:
+        sources (array-like): Source forecasts, shape (n_sources, n_years)
+        weights (array-like, optional): Probability of drawing each source
+    """
+
+    def __init__(self, sources: ArrayLike, weights: Optional[ArrayLike] = None):
+        self.sources = np.asarray(sources, dtype=float)
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        if self.weights is not None:
+            self.weights = self.weights / self.weights.sum()
+
+    def sample(self, rng: np.random.Generator, n_samples: int) -> np.ndarray:
+        idx = rng.choice(len(self.sources), size=n_samples, p=self.weights)
+        return self.sources[idx]
+
+
+NodeDistribution = Union[BetaNode, LogitNormalNode, EmpiricalNode, ArrayLike]
+
+
+# %%
+def sample_lock_in(
+    cpt,
+    nodes: Dict[str, NodeDistribution],
+    n_samples: int = 1_000_000,
+    chunk_size: int = 1 << 13,
+    quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+    n_bins: int = 1 << 16,
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Propagate node uncertainty through the CPT by Monte Carlo sampling.
+
+    Samples are drawn and contracted chunk by chunk. Quantiles are read from a
+    fixed-size histogram per year, so memory does not grow with n_samples and
+    quantiles are accurate to 1 / n_bins.
+
+    Args:
+        cpt: CPT accepted by contract_cpt, in the same parent order as nodes
+        nodes (dict): Ordered mapping of node names to distributions. Plain
+            arrays are treated as fixed point estimates
+        n_samples (int): Total number of samples
+        chunk_size (int): Number of samples contracted at once
+        quantiles (list): Quantiles to report for each year
+        n_bins (int): Histogram resolution over [0, 1]
+        seed (int, optional): Seed for the random generator
+
+    Returns:
+        dict: "mean" with shape (n_years,), and "quantiles" with shape
+        (len(quantiles), n_years) alongside the "levels" they were taken at
+    """
+    if n_samples <= 0:
+        raise ValueError(f"n_samples must be positive, not {n_samples}")
+    rng = np.random.default_rng(seed)
+    n_years = None
+    counts = None
+    total = None
+
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        marginals = [
+            (
+                node.sample(rng, size)
+                if hasattr(node, "sample")
+                else np.asarray(node, dtype=float)
+            )
+            for node in nodes.values()
+        ]
+        p_lock_in = np.broadcast_to(
+            contract_cpt(cpt, marginals), (size, marginals[0].shape[-1])
+        )
+
+        if counts is None:
+            n_years = p_lock_in.shape[1]
+            counts = np.zeros(n_years * n_bins, dtype=np.int64)
+            total = np.zeros(n_years)
+
+        total += p_lock_in.sum(axis=0)
+
+        # Offset each year's bins so one bincount fills every histogram
+        bins = np.minimum((p_lock_in * n_bins).astype(np.int64), n_bins - 1)
+        bins += np.arange(n_years) * n_bins
+        counts += np.bincount(bins.ravel(), minlength=n_years * n_bins)
+
+    cumulative = np.cumsum(counts.reshape(n_years, n_bins), axis=1)
+    levels = np.asarray(quantiles, dtype=float)
+    bands = np.empty((len(levels), n_years))
+    for year_idx in range(n_years):
+        idx = np.searchsorted(cumulative[year_idx], levels * n_samples)
+        bands[:, year_idx] = (idx + 0.5) / n_bins
+
+    return {"levels": levels, "quantiles": bands, "mean": total / n_samples}
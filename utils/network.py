@@ -0,0 +1,284 @@
+# %%
+import string
+import numpy as np
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from numpy.typing import ArrayLike
+
+_LETTERS = string.ascii_letters
+
+
+# %%
+class Factor:
+    """
+    Table over binary variables, with any batch dimensions (such as forecast
+    years) after the variable axes. Index 1 on a variable axis means the event
+    happened.
+    """
+
+    def __init__(self, variables: Sequence[str], values: ArrayLike):
+        self.variables = tuple(variables)
+        self.values = np.asarray(values, dtype=float)
+
+    def reduce(self, evidence: Dict[str, bool]) -> "Factor":
+        """
+        Fix observed variables and drop their axes.
+        """
+        index = tuple(
+            int(evidence[v]) if v in evidence else slice(None) for v in self.variables
+        )
+        return Factor(
+            [v for v in self.variables if v not in evidence], self.values[index]
+        )
+
+    @staticmethod
+    def product(factors: Sequence["Factor"], keep: Iterable[str]) -> "Factor":
+        """
+        Multiply factors and sum out every variable not in keep, in one
+        contraction.
+        """
+        variables = []
+        for factor in factors:
+            variables.extend(v for v in factor.variables if v not in variables)
+        if len(variables) > len(_LETTERS):
+            raise ValueError(f"Cannot contract more than {len(_LETTERS)} variables")
+
+        letter = {v: _LETTERS[i] for i, v in enumerate(variables)}
+        kept = [v for v in variables if v in set(keep)]
+        subscripts = ",".join(
+            "".join(letter[v] for v in f.variables) + "..." for f in factors
+        )
+        subscripts += "->" + "".join(letter[v] for v in kept) + "..."
+        values = np.einsum(subscripts, *[f.values for f in factors], optimize=True)
+        return Factor(kept, values)
+
+
+# %%
+class BayesianNetwork:
+    """
+    Network of binary events with exact inference by variable elimination.
+
+    Each node stores P(node | parents) for every combination of parent states,
+    optionally varying over trailing batch dimensions such as forecast years.
+    Queries only touch the ancestors of the query and evidence variables,
+    eliminate the rest in a greedy min-fill order, and cache the resulting
+    joint factor. Later queries over the same variables with different
+    evidence values are a table lookup, and queries over a subset of cached
+    variables only sum out the extra axes.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Tuple[Tuple[str, ...], np.ndarray]] = {}
+        self._joint_cache: Dict[FrozenSet[str], Factor] = {}
+
+    def add_node(
+        self, name: str, probabilities: ArrayLike, parents: Sequence[str] = ()
+    ) -> None:
+        """
+        Add an event to the network.
+
+        Args:
+            name (str): Name of the event
+            probabilities (array-like): P(event | parents) with shape
+                (2,) * len(parents), optionally followed by batch dimensions
+                such as (n_years,)
+            parents (list): Names of nodes already in the network
+        """
+        missing = [p for p in parents if p not in self.nodes]
+        if missing:
+            raise ValueError(f"Unknown parents of '{name}': {missing}")
+        table = np.asarray(probabilities, dtype=float)
+        if table.shape[: len(parents)] != (2,) * len(parents):
+            raise ValueError(
+                f"Table for '{name}' must start with {len(parents)} axes of size 2"
+            )
+        self.nodes[name] = (tuple(parents), table)
+        self._joint_cache.clear()
+
+    def add_noisy_or(
+        self,
+        name: str,
+        parents: Sequence[str],
+        weights: Sequence[float],
+        leak: float = 0.0,
+    ) -> None:
+        """
+        Add a noisy-OR event without its 2^n table. Hidden node "name/k" is
+        true if parent k or any later parent caused the event, so the chain
+        only holds factors over three variables.
+
+        Args:
+            name (str): Name of the event
+            parents (list): Names of nodes already in the network
+            weights (array-like): Probability that each parent alone causes
+                the event
+            leak (float): Probability of the event with no parent happening
+        """
+        self._add_chain(
+            name,
+            parents,
+            lambda k, later, state: np.maximum(later, weights[k] * state),
+            leak,
+        )
+
+    def add_additive(
+        self,
+        name: str,
+        parents: Sequence[str],
+        weights: Sequence[float],
+        baseline: float = 0.0,
+    ) -> None:
+        """
+        Add an event with P(event | parents) = baseline + the weights of the
+        parents that happened, without its 2^n table.
+
+        Negative weights are rewritten as positive weights on the parent not
+        happening. The event is then a mixture: with probability equal to the
+        baseline it happens, with probability equal to weight k it copies
+        parent k's literal, and otherwise it does not happen. A chain of
+        hidden nodes "name/k" picks the component, each taking parent k with
+        probability weight k over the mass left from k on.
+
+        Args:
+            name (str): Name of the event
+            parents (list): Names of nodes already in the network
+            weights (array-like): Change in probability when each parent
+                happens
+            baseline (float): Probability of the event with no parent
+                happening
+        """
+        weights = np.asarray(weights, dtype=float)
+        baseline = baseline + weights.clip(max=0).sum()
+        remaining = 1 - baseline - np.concatenate([[0.0], np.cumsum(abs(weights))])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(remaining[:-1] > 0, abs(weights) / remaining[:-1], 1.0)
+
+        def step(k, later, state):
+            literal = state if weights[k] >= 0 else 1 - state
+            return share[k] * literal + (1 - share[k]) * later
+
+        self._add_chain(name, parents, step, baseline)
+
+    def _add_chain(self, name, parents, step, start) -> None:
+        # Hidden node k has parents (node k + 1, parent k), the last one only
+        # its parent; the event itself happens with probability start, or
+        # else if hidden node 0 is true
+        later = None
+        for k in reversed(range(len(parents))):
+            states = np.array([0.0, 1.0])
+            if later is None:
+                table = step(k, 0.0, states)
+                self.add_node(f"{name}/{k}", table, [parents[k]])
+            else:
+                table = step(k, states[:, None], states[None, :])
+                self.add_node(f"{name}/{k}", table, [later, parents[k]])
+            later = f"{name}/{k}"
+        if later is None:
+            self.add_node(name, start)
+        else:
+            self.add_node(name, [start, 1.0], [later])
+
+    def factor(self, name: str) -> Factor:
+        parents, table = self.nodes[name]
+        return Factor(
+            parents + (name,), np.stack([1 - table, table], axis=len(parents))
+        )
+
+    def ancestors(self, names: Iterable[str]) -> List[str]:
+        """
+        The given nodes and all their ancestors, in insertion order.
+        """
+        found = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in found:
+                found.add(name)
+                stack.extend(self.nodes[name][0])
+        return [name for name in self.nodes if name in found]
+
+    @staticmethod
+    def elimination_order(factors: Sequence[Factor], keep: Iterable[str]) -> List[str]:
+        """
+        Greedy min-fill elimination order, breaking ties by fewest neighbours.
+        """
+        keep = set(keep)
+        neighbours: Dict[str, set] = {}
+        for factor in factors:
+            for v in factor.variables:
+                neighbours.setdefault(v, set()).update(factor.variables)
+        for v in neighbours:
+            neighbours[v].discard(v)
+
+        order = []
+        remaining = [v for v in neighbours if v not in keep]
+        while remaining:
+
+            def cost(v):
+                adjacent = list(neighbours[v])
+                fill = sum(
+                    1
+                    for i, a in enumerate(adjacent)
+                    for b in adjacent[i + 1 :]
+                    if b not in neighbours[a]
+                )
+                return fill, len(adjacent)
+
+            v = min(remaining, key=cost)
+            for a in neighbours[v]:
+                neighbours[a].update(neighbours[v] - {a})
+                neighbours[a].discard(v)
+            del neighbours[v]
+            remaining.remove(v)
+            order.append(v)
+        return order
+
+    def joint(self, variables: Iterable[str]) -> Factor:
+        """
+        Joint distribution over the given variables, with every other variable
+        summed out. Cached per set of variables, and taken from a cached
+        superset when there is one.
+        """
+        variables = frozenset(variables)
+        if variables in self._joint_cache:
+            return self._joint_cache[variables]
+
+        # Marginalise the smallest cached joint that covers these variables
+        supersets = [key for key in self._joint_cache if variables <= key]
+        if supersets:
+            joint = Factor.product(
+                [self._joint_cache[min(supersets, key=len)]], variables
+            )
+            self._joint_cache[variables] = joint
+            return joint
+
+        factors = [self.factor(name) for name in self.ancestors(variables)]
+        for v in self.elimination_order(factors, variables):
+            involved = [f for f in factors if v in f.variables]
+            factors = [f for f in factors if v not in f.variables]
+            remaining = set().union(*(f.variables for f in involved)) - {v}
+            factors.append(Factor.product(involved, remaining))
+
+        joint = Factor.product(factors, variables)
+        self._joint_cache[variables] = joint
+        return joint
+
+    def query(
+        self, target: str, evidence: Optional[Dict[str, bool]] = None
+    ) -> np.ndarray:
+        """
+        P(target | evidence) for each batch entry, e.g. each forecast year.
+
+        Args:
+            target (str): Node to query
+            evidence (dict, optional): Observed node states, e.g. {"wwiii": True}
+
+        Returns:
+            numpy.ndarray: Probability that target happened, given the evidence
+        """
+        evidence = dict(evidence or {})
+        if target in evidence:
+            raise ValueError(f"'{target}' is both the target and evidence")
+
+        joint = self.joint([target, *evidence]).reduce(evidence)
+        p_true = joint.values[1]
+        return p_true / (joint.values[0] + p_true)
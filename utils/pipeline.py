@@ -0,0 +1,187 @@
+# %%
+import hashlib
+import json
+import os
+import sys
+import types
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from numpy.typing import ArrayLike
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache", "pipeline")
+
+
+# %%
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Module file path to (modification time, hash of its source)
+_source_digests: Dict[str, Tuple[int, bytes]] = {}
+
+
+def _repo_modules(module_name: str) -> List[str]:
+    """
+    Names of the repository modules module_name depends on, itself included:
+    every module it imports, or imports names from, whose file lives in the
+    repository, followed transitively.
+    """
+    found = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        module = sys.modules.get(name)
+        path = getattr(module, "__file__", None)
+        if name in found or path is None:
+            continue
+        path = os.path.abspath(path)
+        if not path.startswith(REPO_ROOT + os.sep) or "site-packages" in path:
+            continue
+        found.add(name)
+        for value in vars(module).values():
+            if isinstance(value, types.ModuleType):
+                pending.append(value.__name__)
+            elif isinstance(getattr(value, "__module__", None), str):
+                pending.append(value.__module__)
+    return sorted(found)
+
+
+def _source_digest(path: str) -> bytes:
+    mtime = os.stat(path).st_mtime_ns
+    cached = _source_digests.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = (mtime, hashlib.sha256(f.read()).digest())
+        _source_digests[path] = cached
+    return cached[1]
+
+
+def _code_digest(func: Callable) -> str:
+    """
+    Hash of a function's bytecode and constants, including those of nested
+    functions, and of the source of every repository module its module
+    depends on, so editing the function or any helper it could call changes
+    the digest.
+    """
+    digest = hashlib.sha256()
+
+    def update(code):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if hasattr(const, "co_code"):
+                update(const)
+            else:
+                digest.update(repr(const).encode())
+
+    code = getattr(func, "__code__", None)
+    if code is None:
+        # Callable objects and builtins fall back to their name
+        digest.update(repr(func).encode())
+    else:
+        update(code)
+
+    for name in _repo_modules(getattr(func, "__module__", None) or ""):
+        digest.update(name.encode())
+        digest.update(_source_digest(os.path.abspath(sys.modules[name].__file__)))
+    return digest.hexdigest()
+
+
+# %%
+class Pipeline:
+    """
+    DAG of derived forecast series, memoised on disk by content.
+
+    Every node is keyed by a hash of its function's name and code, the
+    source of the repository modules it depends on, its parameters and the keys of its inputs, and source nodes by a hash of their
+    data. Changing one source therefore changes the keys, and forces
+    recomputation, of only the nodes downstream of it; everything else is
+    read back from the cache.
+
+    Args:
+        cache_dir (str, optional): Directory for cached results. Pass None to
+            keep results in memory only
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.nodes: Dict[str, dict] = {}
+        self._keys: Dict[str, str] = {}
+        self._values: Dict[str, np.ndarray] = {}
+
+    def source(self, name: str, value: ArrayLike) -> None:
+        """
+        Register or replace raw input data.
+        """
+        value = np.asarray(value, dtype=float)
+        digest = hashlib.sha256(
+            f"source:{name}:{value.shape}".encode() + value.tobytes()
+        ).hexdigest()
+        self.nodes[name] = {"key": digest, "value": value}
+        self._keys.clear()
+
+    def node(
+        self,
+        name: str,
+        func: Callable[..., ArrayLike],
+        inputs: Sequence[str] = (),
+        **params,
+    ) -> None:
+        """
+        Register a derived series computed as func(*inputs, **params).
+
+        The function's qualified name and code, and the source of the
+        repository modules it depends on, are part of the cache key, so
+        editing it or a helper it calls recomputes the node.
+        """
+        self.nodes[name] = {"func": func, "inputs": list(inputs), "params": params}
+        self._keys.clear()
+
+    def key(self, name: str) -> str:
+        if name in self._keys:
+            return self._keys[name]
+
+        node = self.nodes[name]
+        if "key" in node:
+            key = node["key"]
+        else:
+            description = json.dumps(
+                {
+                    "func": f"{node['func'].__module__}.{node['func'].__qualname__}",
+                    "code": _code_digest(node["func"]),
+                    "params": node["params"],
+                    "inputs": [self.key(i) for i in node["inputs"]],
+                },
+                sort_keys=True,
+                default=lambda v: np.asarray(v).tolist(),
+            )
+            key = hashlib.sha256(description.encode()).hexdigest()
+
+        self._keys[name] = key
+        return key
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        Value of a node, from memory, the disk cache or by computing it.
+        """
+        key = self.key(name)
+        if key in self._values:
+            return self._values[key]
+
+        node = self.nodes[name]
+        path = None if self.cache_dir is None else os.path.join(self.cache_dir, key)
+
+        if "value" in node:
+            value = node["value"]
+        elif path is not None and os.path.exists(path + ".npy"):
+            value = np.load(path + ".npy")
+        else:
+            inputs = [self.get(i) for i in node["inputs"]]
+            value = np.asarray(node["func"](*inputs, **node["params"]), dtype=float)
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Save under a temporary name first so concurrent or
+                # interrupted runs never read a partial file
+                np.save(path + ".tmp.npy", value)
+                os.replace(path + ".tmp.npy", path + ".npy")
+
+        self._values[key] = value
+        return value
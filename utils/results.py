@@ -0,0 +1,302 @@
+# %%
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Sequence
+from numpy.typing import ArrayLike
+from utils.cpt import CPTLike, to_dense
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+HAS_ARROW = pa is not None
+
+Columns = Dict[str, np.ndarray]
+
+
+# %%
+def forecast_columns(forecast: Dict[str, Sequence[float]], run: str) -> Columns:
+    """
+    Wide table of a generate_forecast result: one row per forecast year.
+    """
+    years = np.asarray(forecast["years"])
+    columns = {"run": np.full(len(years), run), "year": years}
+    for name, values in forecast.items():
+        if name != "years":
+            columns[name] = np.asarray(values, dtype=float)
+    return columns
+
+
+def node_columns(
+    nodes: Dict[str, ArrayLike], forecast_years: Sequence[float], run: str
+) -> Columns:
+    """
+    Long table of node inputs: one row per node and forecast year.
+    """
+    n_years = len(forecast_years)
+    return {
+        "run": np.full(len(nodes) * n_years, run),
+        "node": np.repeat(list(nodes), n_years),
+        "year": np.tile(np.asarray(forecast_years), len(nodes)),
+        "probability": np.concatenate(
+            [np.asarray(p, dtype=float).reshape(n_years) for p in nodes.values()]
+        ),
+    }
+
+
+def cpt_columns(
+    cpt: CPTLike, run: str, parents: Optional[Sequence[str]] = None
+) -> Columns:
+    """
+    One row per combination of parent states, with a 0/1 column per parent in
+    bit order and the lock-in probability.
+    """
+    table = to_dense(cpt)
+    parents = parents or getattr(cpt, "parents", None)
+    parents = parents or [f"parent_{i}" for i in range(table.ndim)]
+
+    states = np.array(list(np.ndindex(table.shape)), dtype=np.int8).reshape(
+        -1, table.ndim
+    )
+    columns = {"run": np.full(table.size, run)}
+    columns.update({name: states[:, i] for i, name in enumerate(parents)})
+    columns["p_lock_in"] = table.ravel()
+    return columns
+
+
+def quantile_columns(
+    monte_carlo: Dict[str, np.ndarray], forecast_years: Sequence[float], run: str
+) -> Columns:
+    """
+    Long table of a sample_lock_in result: one row per year for the mean and
+    for each quantile level. The mean row has a NaN level.
+    """
+    levels = np.concatenate([[np.nan], monte_carlo["levels"]])
+    values = np.vstack([monte_carlo["mean"], monte_carlo["quantiles"]])
+    n_years = len(forecast_years)
+    return {
+        "run": np.full(values.size, run),
+        "statistic": np.repeat(
+            ["mean"] + ["quantile"] * len(monte_carlo["levels"]), n_years
+        ),
+        "level": np.repeat(levels, n_years),
+        "year": np.tile(np.asarray(forecast_years), len(levels)),
+        "p_lock_in": values.ravel(),
+    }
+
+
+def _column_to_numpy(column) -> np.ndarray:
+    # Single-chunk numeric columns without nulls can be viewed without copying
+    if column.num_chunks == 1 and column.null_count == 0:
+        try:
+            return column.chunk(0).to_numpy(zero_copy_only=True)
+        except pa.ArrowInvalid:
+            pass
+    return column.to_numpy()
+
+
+# %%
+class ResultStore:
+    """
+    Directory of result tables, each stored as numbered part files that are
+    only ever added, never rewritten.
+
+    With pyarrow installed parts are Arrow IPC files by default, which readers
+    memory-map so numeric columns are numpy views of the file rather than
+    copies, or Parquet files when compact storage matters more. Without
+    pyarrow parts are CSV files.
+
+    Args:
+        root (str): Directory holding one subdirectory per table
+        format (str, optional): "arrow", "parquet" or "csv". Defaults to
+            "arrow" when pyarrow is available, otherwise "csv"
+    """
+
+    _EXTENSIONS = {"arrow": ".arrow", "parquet": ".parquet", "csv": ".csv"}
+
+    def __init__(self, root: str, format: Optional[str] = None):
+        format = format or ("arrow" if HAS_ARROW else "csv")
+        if format not in self._EXTENSIONS:
+            raise ValueError(f"Unknown format '{format}'")
+        if format != "csv" and not HAS_ARROW:
+            raise ImportError(f"Writing {format} files requires pyarrow")
+        self.root = root
+        self.format = format
+
+    def parts(self, table: str) -> List[str]:
+        """
+        Paths of the part files of a table, in the order they were written.
+        """
+        directory = os.path.join(self.root, table)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.startswith("part-")
+            and os.path.splitext(name)[1] in self._EXTENSIONS.values()
+        )
+
+    def append(self, table: str, columns: Columns) -> str:
+        """
+        Write columns as a new part of the table and return its path.
+        """
+        directory = os.path.join(self.root, table)
+        os.makedirs(directory, exist_ok=True)
+        existing = self.parts(table)
+        index = (
+            int(os.path.basename(existing[-1]).split("-")[1].split(".")[0]) + 1
+            if existing
+            else 0
+        )
+        path = os.path.join(
+            directory, f"part-{index:06d}{self._EXTENSIONS[self.format]}"
+        )
+
+        # Write to a temporary file first so readers never see a partial part
+        tmp_path = path + ".tmp"
+        if self.format == "csv":
+            pd.DataFrame(columns).to_csv(tmp_path, index=False)
+        else:
+            arrow_table = pa.table(columns)
+            if self.format == "parquet":
+                pq.write_table(arrow_table, tmp_path)
+            else:
+                with pa.OSFile(tmp_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                        writer.write_table(arrow_table)
+        os.replace(tmp_path, path)
+        return path
+
+    def iter_parts(self, table: str, memory_map: bool = True) -> Iterator[Columns]:
+        """
+        Columns of each part in turn. Numeric columns of Arrow parts are
+        zero-copy views of the memory-mapped file when memory_map is set.
+        """
+        for path in self.parts(table):
+            extension = os.path.splitext(path)[1]
+            if extension == ".csv":
+                frame = pd.read_csv(path)
+                yield {name: frame[name].to_numpy() for name in frame.columns}
+                continue
+            if pa is None:
+                raise ImportError(f"Reading {path} requires pyarrow")
+            if extension == ".parquet":
+                arrow_table = pq.read_table(path, memory_map=memory_map)
+            else:
+                source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+                arrow_table = pa.ipc.open_file(source).read_all()
+            yield {
+                name: _column_to_numpy(arrow_table.column(name))
+                for name in arrow_table.column_names
+            }
+
+    def read(self, table: str, memory_map: bool = True) -> Columns:
+        """
+        All parts of a table concatenated into one set of columns.
+        """
+        parts = list(self.iter_parts(table, memory_map))
+        if not parts:
+            raise FileNotFoundError(f"No results stored for table '{table}'")
+        if len(parts) == 1:
+            return parts[0]
+        return {
+            name: np.concatenate([part[name] for part in parts]) for name in parts[0]
+        }
+
+    def write_run(
+        self,
+        run: str,
+        forecast: Optional[Dict[str, Sequence[float]]] = None,
+        nodes: Optional[Dict[str, ArrayLike]] = None,
+        cpt: Optional[CPTLike] = None,
+        monte_carlo: Optional[Dict[str, np.ndarray]] = None,
+        forecast_years: Optional[Sequence[float]] = None,
+    ) -> Dict[str, str]:
+        """
+        Append whichever results of one run are given to the "forecasts",
+        "nodes", "cpts" and "quantiles" tables.
+
+        Returns:
+            dict: Table name to the path of the part written
+        """
+        if forecast_years is None and forecast is not None:
+            forecast_years = forecast["years"]
+        if forecast_years is None and (nodes is not None or monte_carlo is not None):
+            raise ValueError(
+                "forecast_years is required when nodes or monte_carlo are given "
+                "without a forecast"
+            )
+        written = {}
+        if forecast is not None:
+            written["forecasts"] = self.append(
+                "forecasts", forecast_columns(forecast, run)
+            )
+        if nodes is not None:
+            written["nodes"] = self.append(
+                "nodes", node_columns(nodes, forecast_years, run)
+            )
+        if cpt is not None:
+            written["cpts"] = self.append("cpts", cpt_columns(cpt, run))
+        if monte_carlo is not None:
+            written["quantiles"] = self.append(
+                "quantiles", quantile_columns(monte_carlo, forecast_years, run)
+            )
+        return written
+
+
+# %%
+def export_sweep(sweep_dir: str, store: ResultStore, table: str = "sweep") -> List[str]:
+    """
+    Copy the chunk files written by run_sweep into a table of the store, one
+    part per chunk, skipping chunks that were exported before.
+
+    The table records the digest from the sweep's manifest, so chunks of a
+    sweep that was re-run with overwrite=True are never mistaken for the
+    ones already exported: exporting a different sweep into the same table
+    raises a ValueError instead of mixing or keeping stale rows.
+
+    Returns:
+        list: Paths of the parts written
+    """
+    chunks = sorted(
+        f
+        for f in os.listdir(sweep_dir)
+        if f.startswith("chunk_") and f.endswith(".npz") and ".tmp" not in f
+    )
+    digest = None
+    manifest_path = os.path.join(sweep_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            digest = json.load(f)["digest"]
+
+    exported_path = os.path.join(store.root, table, ".exported")
+    exported = {"digest": digest, "chunks": []}
+    if os.path.exists(exported_path):
+        with open(exported_path) as f:
+            exported = json.load(f)
+        if exported["digest"] != digest:
+            raise ValueError(
+                f"Table '{table}' holds rows from a different sweep than "
+                f"{sweep_dir}; export into a new table"
+            )
+
+    written = []
+    for chunk in chunks:
+        if chunk in exported["chunks"]:
+            continue
+        with np.load(os.path.join(sweep_dir, chunk)) as shard:
+            columns = {name: shard[name] for name in shard.files}
+        # One column per year of lock-in probabilities
+        p_lock_in = columns.pop("p_lock_in")
+        for year_idx in range(p_lock_in.shape[1]):
+            columns[f"p_lock_in_{year_idx}"] = p_lock_in[:, year_idx]
+        written.append(store.append(table, columns))
+        exported["chunks"].append(chunk)
+        with open(exported_path, "w") as f:
+            json.dump(exported, f)
+    return written
@@ -0,0 +1,269 @@
+# %%
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Union
+from numpy.typing import ArrayLike
+from utils.cpt import AdditiveCPT, CPTLike, NoisyOrCPT, contract_cpt, to_dense
+from utils.monte_carlo import NodeDistribution
+
+if TYPE_CHECKING:
+    import pandas
+
+
+# %%
+def _parametric_gradients(
+    cpt: Union[AdditiveCPT, NoisyOrCPT], marginals: Sequence[np.ndarray]
+) -> Dict[str, np.ndarray]:
+    p = np.stack(marginals)
+    weights = cpt.weights.reshape((-1,) + (1,) * (p.ndim - 1))
+    if isinstance(cpt, AdditiveCPT):
+        return {
+            "value": cpt.baseline + (weights * p).sum(axis=0),
+            "marginals": np.broadcast_to(weights, p.shape),
+            "weights": p,
+            "baseline": np.ones(p.shape[1:]),
+        }
+
+    # Products of (1 - w_j * p_j) over every j other than i, from prefix and
+    # suffix products so that a factor of zero does not divide
+    factors = 1 - weights * p
+    ones = np.ones((1,) + p.shape[1:])
+    prefix = np.cumprod(np.concatenate([ones, factors[:-1]]), axis=0)
+    suffix = np.cumprod(np.concatenate([ones, factors[:0:-1]]), axis=0)[::-1]
+    others = (1 - cpt.leak) * prefix * suffix
+    survival = np.prod(factors, axis=0)
+    return {
+        "value": 1 - (1 - cpt.leak) * survival,
+        "marginals": weights * others,
+        "weights": p * others,
+        "leak": survival,
+    }
+
+
+def lock_in_gradients(
+    cpt: CPTLike, marginals: Sequence[ArrayLike]
+) -> Dict[str, np.ndarray]:
+    """
+    Exact partial derivatives of P(Lock-in) with respect to every parent
+    marginal and every CPT entry, for independent parents.
+
+    The marginal derivatives are carried forward alongside the value through
+    the same one-parent-at-a-time contraction as contract_cpt, so all of them
+    come out of a single pass. P(Lock-in) is linear in each CPT entry, with
+    derivative equal to the probability of that combination of parent states.
+
+    Additive and noisy-OR CPTs are differentiated in closed form in
+    O(n_parents), with respect to their parameters instead of the 2^n table
+    entries.
+
+    Args:
+        cpt: CPT accepted by contract_cpt
+        marginals (list): One probability array per parent, each of shape
+            (n_years,) or (n_scenarios, n_years)
+
+    Returns:
+        dict: "value" P(Lock-in) with the batch shape of the marginals and
+        "marginals" dP/dp_i of shape (n_parents, *batch). Dense CPTs add "cpt"
+        dP/dCPT of shape (2,) * n_parents + batch; additive CPTs add "weights"
+        dP/dw_i of shape (n_parents, *batch) and "baseline", noisy-OR CPTs
+        "weights" and "leak"
+    """
+    parametric = isinstance(cpt, (AdditiveCPT, NoisyOrCPT))
+    table = None if parametric else to_dense(cpt)
+    n_parents = cpt.n_parents if parametric else table.ndim
+    if n_parents != len(marginals):
+        raise ValueError(
+            f"CPT has {n_parents} parents but {len(marginals)} marginals were given"
+        )
+    marginals = np.broadcast_arrays(*[np.asarray(p, dtype=float) for p in marginals])
+    if parametric:
+        return _parametric_gradients(cpt, marginals)
+    batch_shape = marginals[0].shape
+
+    # Row 0 holds the value, row i + 1 its derivative with respect to p_i
+    state = np.zeros((n_parents + 1,) + table.shape + (1,) * len(batch_shape))
+    state[0] = table.reshape(table.shape + (1,) * len(batch_shape))
+    for i, p in enumerate(marginals):
+        value = state[0]
+        state = state[:, 0] * (1 - p) + state[:, 1] * p
+        state[i + 1] = value[1] - value[0]
+    state = np.broadcast_to(state, (n_parents + 1,) + batch_shape)
+
+    # Probability of each combination of parent states
+    weights = np.ones(batch_shape)
+    for p in marginals:
+        weights = np.stack([weights * (1 - p), weights * p])
+    weights = weights.transpose(
+        tuple(range(n_parents))[::-1] + tuple(range(n_parents, weights.ndim))
+    )
+
+    return {"value": state[0], "marginals": state[1:], "cpt": weights}
+
+
+# %%
+def sobol_indices(
+    cpt: CPTLike,
+    nodes: Dict[str, NodeDistribution],
+    n_samples: int = 100_000,
+    chunk_size: int = 1 << 13,
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    First-order and total Sobol indices of P(Lock-in) with respect to the
+    uncertainty in each node, using the same node distributions as
+    sample_lock_in.
+
+    Uses the Saltelli sampling scheme with the Saltelli (2010) first-order and
+    Jansen total-effect estimators, accumulated chunk by chunk so memory does
+    not grow with n_samples. Costs n_samples * (n_nodes + 2) contractions.
+
+    Args:
+        cpt: CPT accepted by contract_cpt, in the same parent order as nodes
+        nodes (dict): Ordered mapping of node names to distributions. Plain
+            arrays are fixed and get zero indices
+        n_samples (int): Number of base samples
+        chunk_size (int): Number of samples contracted at once
+        seed (int, optional): Seed for the random generator
+
+    Returns:
+        dict: "names" of the nodes, "first_order" and "total" indices of shape
+        (n_nodes, n_years), and the "variance" of P(Lock-in) per year
+    """
+    rng = np.random.default_rng(seed)
+    names = list(nodes)
+
+    def draw(size):
+        return [
+            (
+                node.sample(rng, size)
+                if hasattr(node, "sample")
+                else np.asarray(node, dtype=float)
+            )
+            for node in nodes.values()
+        ]
+
+    sums = None
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        a, b = draw(size), draw(size)
+        n_years = np.broadcast(*a, *b).shape[-1]
+        f_a = np.broadcast_to(contract_cpt(cpt, a), (size, n_years))
+        f_b = np.broadcast_to(contract_cpt(cpt, b), (size, n_years))
+
+        if sums is None:
+            sums = {
+                "f": np.zeros(n_years),
+                "f2": np.zeros(n_years),
+                "first_order": np.zeros((len(names), n_years)),
+                "total": np.zeros((len(names), n_years)),
+            }
+        sums["f"] += f_a.sum(axis=0) + f_b.sum(axis=0)
+        sums["f2"] += (f_a**2).sum(axis=0) + (f_b**2).sum(axis=0)
+
+        for i in range(len(names)):
+            # A with node i taken from B
+            f_ab = np.broadcast_to(
+                contract_cpt(cpt, a[:i] + [b[i]] + a[i + 1 :]), (size, n_years)
+            )
+            sums["first_order"][i] += (f_b * (f_ab - f_a)).sum(axis=0)
+            sums["total"][i] += ((f_a - f_ab) ** 2).sum(axis=0)
+
+    mean = sums["f"] / (2 * n_samples)
+    variance = sums["f2"] / (2 * n_samples) - mean**2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        first_order = sums["first_order"] / n_samples / variance
+        total = sums["total"] / (2 * n_samples) / variance
+
+    return {
+        "names": names,
+        "first_order": np.nan_to_num(first_order),
+        "total": np.nan_to_num(total),
+        "variance": variance,
+    }
+
+
+# %%
+def tornado_table(
+    cpt: CPTLike,
+    nodes: Dict[str, ArrayLike],
+    forecast_years: Sequence[float],
+    delta: float = 0.1,
+    include_cpt: bool = True,
+) -> "pandas.DataFrame":
+    """
+    One row per input and forecast year with P(Lock-in) when that input is
+    moved down and up by delta, sorted by swing for a tornado chart.
+
+    P(Lock-in) is linear in each marginal and each CPT entry, so the low and
+    high values follow exactly from the gradients, with the input clipped to
+    [0, 1].
+
+    Args:
+        cpt: CPT accepted by contract_cpt, in the same parent order as nodes
+        nodes (dict): Ordered mapping of node names to probabilities over the
+            forecast years, each of shape (n_years,)
+        forecast_years (list): Years matching the node arrays
+        delta (float): Absolute change applied to each input
+        include_cpt (bool): Also include a row for every CPT entry, or for
+            every weight and the baseline or leak of a parametric CPT
+
+    Returns:
+        pandas.DataFrame: Columns "input", "year", "value", "gradient", "base",
+        "low", "high" and "swing"
+    """
+    import pandas as pd
+
+    names = list(nodes)
+    marginals = [np.asarray(p, dtype=float) for p in nodes.values()]
+    gradients = lock_in_gradients(cpt, marginals)
+    base = gradients["value"]
+    if base.shape != (len(forecast_years),):
+        raise ValueError(
+            f"Node probabilities must each have shape ({len(forecast_years)},), "
+            f"one per forecast year, not {base.shape}"
+        )
+
+    inputs = list(names)
+    values = list(np.broadcast_arrays(*marginals))
+    slopes = list(gradients["marginals"])
+    if include_cpt and isinstance(cpt, (AdditiveCPT, NoisyOrCPT)):
+        for name, weight, slope in zip(names, cpt.weights, gradients["weights"]):
+            inputs.append(f"weight[{name}]")
+            values.append(np.broadcast_to(weight, base.shape))
+            slopes.append(slope)
+        intercept = "baseline" if isinstance(cpt, AdditiveCPT) else "leak"
+        inputs.append(intercept)
+        values.append(np.broadcast_to(getattr(cpt, intercept), base.shape))
+        slopes.append(gradients[intercept])
+    elif include_cpt:
+        table = to_dense(cpt)
+        for index in np.ndindex(table.shape):
+            states = ", ".join(
+                f"{'' if happened else 'no '}{name}"
+                for name, happened in zip(names, index)
+            )
+            inputs.append(f"CPT[{states}]")
+            values.append(np.broadcast_to(table[index], base.shape))
+            slopes.append(gradients["cpt"][index])
+
+    rows = []
+    for name, value, slope in zip(inputs, values, slopes):
+        low = base + slope * (np.clip(value - delta, 0, 1) - value)
+        high = base + slope * (np.clip(value + delta, 0, 1) - value)
+        for year_idx, year in enumerate(forecast_years):
+            rows.append(
+                {
+                    "input": name,
+                    "year": year,
+                    "value": float(value[year_idx]),
+                    "gradient": float(slope[year_idx]),
+                    "base": float(base[year_idx]),
+                    "low": float(low[year_idx]),
+                    "high": float(high[year_idx]),
+                }
+            )
+
+    table = pd.DataFrame(rows)
+    table["swing"] = (table["high"] - table["low"]).abs()
+    return table.sort_values(["year", "swing"], ascending=[True, False]).reset_index(
+        drop=True
+    )
@@ -0,0 +1,169 @@
+# %%
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from numpy.typing import ArrayLike
+from utils.curves import PchipCurve
+from utils.geometric_mean_odds import geometric_mean_odds
+from utils.interpolate_extrapolate import regrid
+from utils.pipeline import DEFAULT_CACHE_DIR, Pipeline
+
+
+# %%
+def interpolate_anchors(
+    anchors: np.ndarray,
+    years: Sequence[float],
+    method: str = "log_odds",
+    ceiling: float = 1.0,
+    hold_before: bool = False,
+    **_,
+) -> np.ndarray:
+    """
+    Regrid a source's (years, probabilities) anchors onto the forecast years.
+
+    Args:
+        anchors (numpy.ndarray): Shape (2, n_anchors), years then probabilities
+        years (list): Forecast years
+        method (str): "log_odds" or "linear" (in probability) for regrid, which
+            extrapolates along the end segments and keeps the curve monotone,
+            or "pchip" for monotone cubic in log-odds held at the end values
+        ceiling (float): Largest probability the curve may reach, so that
+            extrapolation stops short of certainty
+        hold_before (bool): Give years before the first anchor its probability
+            instead of extrapolating back
+    """
+    anchor_years, probabilities = anchors
+    if method == "log_odds":
+        values = regrid(years, anchor_years, probabilities, space="log_odds")
+    elif method == "linear":
+        values = regrid(years, anchor_years, probabilities, space="probability")
+    elif method == "pchip":
+        values = PchipCurve(anchor_years, probabilities)(years)
+    else:
+        raise ValueError(f"Unknown interpolation method '{method}'")
+
+    if hold_before:
+        first = np.argmin(anchor_years)
+        values = np.where(
+            np.asarray(years) < anchor_years[first], probabilities[first], values
+        )
+    return np.minimum(values, ceiling)
+
+
+def aggregate_curves(*curves: np.ndarray) -> np.ndarray:
+    # Geometric mean of odds across sources for each year
+    return geometric_mean_odds(np.stack(curves), axis=0)
+
+
+# %%
+class SourceRegistry:
+    """
+    Forecast sources grouped by the event they forecast, each stored once as
+    raw (year, probability) anchors with a version stamp.
+
+    Sources and their aggregates are nodes of a Pipeline, so curves are only
+    interpolated when asked for and are cached by content. Updating one source
+    changes the keys of that source's curve and of its group's aggregate only;
+    every other curve is read back from the cache.
+
+    Args:
+        years (list): Forecast years every source is regridded onto
+        pipeline (Pipeline, optional): Pipeline to register nodes on. Defaults
+            to a new one caching in cache_dir
+        cache_dir (str, optional): Cache directory for a new pipeline
+    """
+
+    def __init__(
+        self,
+        years: Sequence[float],
+        pipeline: Optional[Pipeline] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    ):
+        self.years = [float(y) for y in years]
+        self.pipeline = pipeline if pipeline is not None else Pipeline(cache_dir)
+        self.groups: Dict[str, Dict[str, dict]] = {}
+
+    def register(
+        self,
+        group: str,
+        name: str,
+        years: ArrayLike,
+        probabilities: ArrayLike,
+        version: str,
+        method: str = "log_odds",
+        **options,
+    ) -> None:
+        """
+        Add a source, or replace it with new anchors and a new version.
+
+        Args:
+            group (str): Event the source forecasts, e.g. "agi"; also the name
+                of the aggregate node
+            name (str): Forecaster, e.g. "Samotsvety"
+            years (array-like): Anchor years, as published by the forecaster
+            probabilities (array-like): Probability of the event by each year
+            version (str): Stamp identifying this release of the forecast
+            method (str): Interpolation method, see interpolate_anchors
+            **options: Other interpolate_anchors arguments, e.g. ceiling
+        """
+        anchors = np.array([years, probabilities], dtype=float)
+        if anchors.ndim != 2 or anchors.shape[1] == 0:
+            raise ValueError(f"Source '{name}' needs matching years and probabilities")
+        if np.any((anchors[1] < 0) | (anchors[1] > 1)):
+            raise ValueError(f"Source '{name}' has probabilities outside [0, 1]")
+
+        self.pipeline.source(f"{group}/{name}/anchors", anchors)
+        self.pipeline.node(
+            f"{group}/{name}",
+            interpolate_anchors,
+            [f"{group}/{name}/anchors"],
+            years=self.years,
+            method=method,
+            version=version,
+            **options,
+        )
+        self.groups.setdefault(group, {})[name] = {
+            "version": version,
+            "method": method,
+            **options,
+        }
+        self.pipeline.node(
+            group,
+            aggregate_curves,
+            [f"{group}/{source}" for source in self.groups[group]],
+        )
+
+    def remove(self, group: str, name: str) -> None:
+        del self.groups[group][name]
+        self.pipeline.node(
+            group,
+            aggregate_curves,
+            [f"{group}/{source}" for source in self.groups[group]],
+        )
+
+    def versions(self, group: str) -> Dict[str, str]:
+        return {name: info["version"] for name, info in self.groups[group].items()}
+
+    def names(self, group: str) -> List[str]:
+        return list(self.groups[group])
+
+    def anchors(self, group: str, name: str) -> np.ndarray:
+        """
+        A source's registered anchors, shape (2, n_anchors): years then
+        probabilities.
+        """
+        return self.pipeline.get(f"{group}/{name}/anchors")
+
+    def curve(self, group: str, name: str) -> np.ndarray:
+        """
+        A source's probabilities on the forecast years.
+        """
+        return self.pipeline.get(f"{group}/{name}")
+
+    def curves(self, group: str) -> Dict[str, np.ndarray]:
+        return {name: self.curve(group, name) for name in self.groups[group]}
+
+    def aggregate(self, group: str) -> np.ndarray:
+        """
+        Geometric mean of odds of a group's sources on the forecast years.
+        """
+        return self.pipeline.get(group)
@@ -0,0 +1,244 @@
+# %%
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from numpy.typing import ArrayLike
+from utils.cpt import AdditiveCPT, CPTLike, contract_cpt
+
+
+# %%
+def grid_design(values: Dict[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+    """
+    Full factorial design over the given parameter values.
+
+    Args:
+        values (dict): Parameter name to the values it should take
+
+    Returns:
+        dict: Parameter name to a column with one entry per design point
+    """
+    points = np.array(list(itertools.product(*values.values())), dtype=float)
+    return {name: points[:, i] for i, name in enumerate(values)}
+
+
+def latin_hypercube_design(
+    bounds: Dict[str, Tuple[float, float]], n_points: int, seed: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Latin hypercube design: each parameter's range is split into n_points
+    strata and every stratum is sampled exactly once.
+
+    Args:
+        bounds (dict): Parameter name to its (low, high) range
+        n_points (int): Number of design points
+        seed (int, optional): Seed for the random generator
+
+    Returns:
+        dict: Parameter name to a column with one entry per design point
+    """
+    rng = np.random.default_rng(seed)
+    design = {}
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(n_points) + rng.uniform(size=n_points)) / n_points
+        design[name] = low + strata * (high - low)
+    return design
+
+
+# %%
+def design_cpt(point: Dict[str, float], names: Sequence[str]) -> CPTLike:
+    """
+    Additive CPT of one design point, from its "<node>_weight" columns and an
+    optional "baseline" column. Weights that would take P(Lock-in | parents)
+    outside [0, 1] raise a ValueError.
+    """
+    weights = [point[f"{name}_weight"] for name in names]
+    return AdditiveCPT(weights, point.get("baseline", 0.0))
+
+
+def evaluate_design(
+    design: Dict[str, np.ndarray],
+    nodes: Dict[str, ArrayLike],
+    cpt: Callable[[Dict[str, float], Sequence[str]], CPTLike] = design_cpt,
+) -> np.ndarray:
+    """
+    Evaluate P(Lock-in) for every point of a sweep design.
+
+    Each design point is turned into a CPT by cpt and contracted with
+    contract_cpt. The default additive design_cpt is evaluated for all points
+    at once with one einsum instead. Optional "<node>_shift" columns move the node curve in
+    log-odds space.
+
+    Args:
+        design (dict): Parameter columns of equal length
+        nodes (dict): Ordered mapping of node names to base probabilities
+        cpt (callable): Builds the CPT of a design point from its parameters
+            and the node names, e.g. a NoisyOrCPT. Must be importable by name
+            for run_sweep. Defaults to the additive design_cpt
+
+    Returns:
+        numpy.ndarray: P(Lock-in) with shape (n_points, n_years)
+    """
+    n_points = len(next(iter(design.values())))
+    names = list(nodes)
+
+    marginals = []
+    for name, p in nodes.items():
+        p = np.broadcast_to(np.asarray(p, dtype=float), (n_points, np.shape(p)[-1]))
+        shift = design.get(f"{name}_shift")
+        if shift is not None:
+            p = np.clip(p, 1e-12, 1 - 1e-12)
+            p = 1 / (1 + (1 - p) / p * np.exp(-shift[:, None]))
+        marginals.append(p)
+
+    if cpt is design_cpt:
+        # Additive CPTs are linear in the marginals, so every point is
+        # evaluated at once, after the same bounds checks as AdditiveCPT
+        weights = np.stack([design[f"{name}_weight"] for name in names], axis=1)
+        baseline = np.asarray(design.get("baseline", np.zeros(n_points)), float)
+        highest = baseline + weights.clip(min=0).sum(axis=1)
+        lowest = baseline + weights.clip(max=0).sum(axis=1)
+        bad = np.flatnonzero((highest > 1) | (lowest < 0))
+        if len(bad):
+            raise ValueError(
+                f"Design points {bad[:10].tolist()} have weights that take "
+                "P(Lock-in | parents) outside [0, 1]"
+            )
+        return baseline[:, None] + np.einsum("sn,nsy->sy", weights, np.stack(marginals))
+
+    p_lock_in = np.empty(marginals[0].shape)
+    for i in range(n_points):
+        point = {name: float(column[i]) for name, column in design.items()}
+        p_lock_in[i] = contract_cpt(cpt(point, names), [p[i] for p in marginals])
+    return p_lock_in
+
+
+def _run_chunk(
+    chunk: Dict[str, np.ndarray],
+    nodes: Dict[str, np.ndarray],
+    path: str,
+    cpt: Callable[[Dict[str, float], Sequence[str]], CPTLike],
+) -> str:
+    p_lock_in = evaluate_design(chunk, nodes, cpt)
+
+    # Write to a temporary file first so an interrupted run never leaves a
+    # half-written shard behind that a resumed run would trust
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, p_lock_in=p_lock_in, **chunk)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _shards(out_dir: str) -> List[str]:
+    return sorted(
+        os.path.join(out_dir, f)
+        for f in os.listdir(out_dir)
+        if f.startswith("chunk_") and f.endswith(".npz") and ".tmp" not in f
+    )
+
+
+def sweep_digest(
+    design: Dict[str, np.ndarray],
+    nodes: Dict[str, np.ndarray],
+    chunk_size: int,
+    cpt: Callable[[Dict[str, float], Sequence[str]], CPTLike],
+) -> str:
+    """
+    Hash of everything that decides the contents of a sweep's shards.
+    """
+    digest = hashlib.sha256()
+    description = {
+        "chunk_size": chunk_size,
+        "cpt": f"{cpt.__module__}.{cpt.__qualname__}",
+        "design": {name: np.shape(column) for name, column in design.items()},
+        "nodes": {name: np.shape(p) for name, p in nodes.items()},
+    }
+    digest.update(json.dumps(description, sort_keys=True).encode())
+    for column in list(design.values()) + list(nodes.values()):
+        digest.update(np.ascontiguousarray(column, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def run_sweep(
+    design: Dict[str, np.ndarray],
+    nodes: Dict[str, ArrayLike],
+    out_dir: str,
+    chunk_size: int = 100_000,
+    max_workers: Optional[int] = None,
+    cpt: Callable[[Dict[str, float], Sequence[str]], CPTLike] = design_cpt,
+    overwrite: bool = False,
+) -> str:
+    """
+    Evaluate a sweep design across a process pool, streaming each chunk of
+    results to its own columnar .npz shard in out_dir.
+
+    out_dir holds a manifest with a hash of the design, nodes, chunk_size and
+    CPT builder. Re-running the same sweep after an interruption skips the
+    shards that already exist; a different sweep in the same directory raises
+    a ValueError unless overwrite is set, which deletes the old shards first.
+
+    Args:
+        design (dict): Parameter columns, see evaluate_design
+        nodes (dict): Ordered mapping of node names to base probabilities
+        out_dir (str): Directory for the result shards
+        chunk_size (int): Design points per shard
+        max_workers (int, optional): Number of processes, defaults to all cores
+        cpt (callable): Builds each design point's CPT, see evaluate_design
+        overwrite (bool): Replace the results of a different sweep in out_dir
+
+    Returns:
+        str: The output directory
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    nodes = {name: np.asarray(p, dtype=float) for name, p in nodes.items()}
+    design = {name: np.asarray(column) for name, column in design.items()}
+    n_points = len(next(iter(design.values())))
+
+    digest = sweep_digest(design, nodes, chunk_size, cpt)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    shards = _shards(out_dir)
+    if shards and (manifest is None or manifest["digest"] != digest):
+        if not overwrite:
+            raise ValueError(
+                f"{out_dir} holds shards from a different sweep; pass "
+                "overwrite=True to replace them or use another directory"
+            )
+        for path in shards:
+            os.remove(path)
+    with open(manifest_path, "w") as f:
+        json.dump({"digest": digest, "n_points": n_points, "chunk_size": chunk_size}, f)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for chunk_idx, start in enumerate(range(0, n_points, chunk_size)):
+            path = os.path.join(out_dir, f"chunk_{chunk_idx:06d}.npz")
+            if os.path.exists(path):
+                continue
+            chunk = {
+                name: column[start : start + chunk_size]
+                for name, column in design.items()
+            }
+            futures.append(executor.submit(_run_chunk, chunk, nodes, path, cpt))
+
+        for future in futures:
+            future.result()
+
+    return out_dir
+
+
+def load_sweep(out_dir: str) -> Dict[str, np.ndarray]:
+    """
+    Concatenate the shards written by run_sweep into one set of columns.
+    """
+    shards = [np.load(path) for path in _shards(out_dir)]
+    return {
+        name: np.concatenate([shard[name] for shard in shards])
+        for name in shards[0].files
+    }